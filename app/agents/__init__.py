@@ -1,7 +1,20 @@
-from app.agents.chart_agent import chart_agent
-from app.agents.zerodha_agent.agent import get_zerodha_agent
+import importlib
 
-___all__ = [
-    chart_agent,
-    get_zerodha_agent
-]
\ No newline at end of file
+# Exported names and the submodule defining each. They are imported on first
+# access: the chart agent alone pulls in numpy.
+_EXPORTS = {
+    "chart_agent": "app.agents.chart_agent",
+    "get_zerodha_agent": "app.agents.zerodha_agent.agent",
+    "get_financial_analyst": "app.agents.financial_analyst.agent",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    # Cache it, also replacing a submodule of the same name that importing it bound here
+    globals()[name] = value
+    return value
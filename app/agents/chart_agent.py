@@ -2,7 +2,6 @@ from __future__ import annotations as _annotations
 
 from dataclasses import dataclass
 from dotenv import load_dotenv
-import logfire
 import asyncio
 import numpy as np
 import random
@@ -10,37 +9,27 @@ import random
 from pydantic_ai import Agent, RunContext
 from typing import List, Dict, Optional, Union, Any
 
-from app.utils import model, CHART_AGENT_SYSTEM_PROMPT
+from app.tools.charts import render_chart
+from app.utils import agent_model, CHART_AGENT_SYSTEM_PROMPT
+from app.utils.llm_scheduler import BULK
 # from model import model
 # from prompts import CHART_AGENT_SYSTEM_PROMPT 
 
 load_dotenv()
 
-logfire.configure(send_to_logfire='if-token-present')
-
 @dataclass
 class Deps:
     reasoner_output: str
 
 chart_agent = Agent(
-    model,
+    agent_model("chart_agent", BULK),
     system_prompt=CHART_AGENT_SYSTEM_PROMPT,
     deps_type=Deps,
     retries=2
 )
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-from typing import List, Dict, Optional
-import base64
-import io
-
-plt.style.use('default')
-sns.set_palette("husl")
-plt.ioff()
-
 @chart_agent.tool
-def create_histogram(
+async def create_histogram(
     ctx: RunContext[Deps],
     data: Optional[List[float]] = None, 
     title: Optional[str] = None,
@@ -71,29 +60,13 @@ def create_histogram(
         np.random.seed(42)  # For reproducible results
         data = np.random.normal(50, 15, sample_size).tolist()
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.hist(data, bins=bins, color=color, alpha=0.7, edgecolor='black')
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Distribution Histogram', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel(x_label or 'Values', fontsize=12)
-    ax.set_ylabel(y_label or 'Frequency', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
+    image = await render_chart(
+        "histogram", data=data, title=title or 'Distribution Histogram', bins=bins,
+        x_label=x_label or 'Values', y_label=y_label or 'Frequency', color=color
+    )
     
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "histogram",
         "data_points": len(data),
@@ -101,7 +74,7 @@ def create_histogram(
     }
 
 @chart_agent.tool
-def create_line_chart(
+async def create_line_chart(
     ctx: RunContext[Deps],
     x_data: Optional[List[Union[float, int]]] = None,
     y_data: Optional[List[Union[float, int]]] = None,
@@ -138,29 +111,14 @@ def create_line_chart(
         np.random.seed(42)
         y_data = np.cumsum(np.random.randn(len(x_data))).tolist()
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(x_data, y_data, color=color, linestyle=line_style, marker=marker, markersize=4)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Line Chart', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel(x_label or 'X Values', fontsize=12)
-    ax.set_ylabel(y_label or 'Y Values', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
+    image = await render_chart(
+        "line_chart", x_values=x_data, y_values=y_data, title=title or 'Line Chart',
+        x_label=x_label or 'X Values', y_label=y_label or 'Y Values',
+        color=color, line_style=line_style, marker=marker, markersize=4
+    )
     
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "line_chart",
         "data_points": len(x_data),
@@ -168,7 +126,7 @@ def create_line_chart(
     }
 
 @chart_agent.tool
-def create_bar_chart(
+async def create_bar_chart(
     ctx: RunContext[Deps],
     categories: Optional[List[str]] = None,
     values: Optional[List[Union[float, int]]] = None,
@@ -201,36 +159,13 @@ def create_bar_chart(
         random.seed(42)
         values = [random.randint(10, 100) for _ in range(len(categories))]
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    if horizontal:
-        ax.barh(categories, values, color=color, alpha=0.7)
-        ax.set_xlabel(y_label or 'Values', fontsize=12)
-        ax.set_ylabel(x_label or 'Categories', fontsize=12)
-    else:
-        ax.bar(categories, values, color=color, alpha=0.7)
-        ax.set_xlabel(x_label or 'Categories', fontsize=12)
-        ax.set_ylabel(y_label or 'Values', fontsize=12)
-        plt.xticks(rotation=45, ha='right')
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Bar Chart', fontsize=16, fontweight='bold')
-    
-    ax.grid(True, alpha=0.3, axis='y' if not horizontal else 'x')
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
+    image = await render_chart(
+        "bar_chart", categories=categories, values=values, title=title or 'Bar Chart',
+        x_label=x_label or 'Categories', y_label=y_label or 'Values', color=color, horizontal=horizontal
+    )
     
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "bar_chart",
         "data_points": len(categories),
@@ -238,7 +173,7 @@ def create_bar_chart(
     }
 
 @chart_agent.tool
-def create_scatter_plot(
+async def create_scatter_plot(
     ctx: RunContext[Deps],
     x_data: Optional[List[Union[float, int]]] = None,
     y_data: Optional[List[Union[float, int]]] = None,
@@ -276,29 +211,13 @@ def create_scatter_plot(
         np.random.seed(43)
         y_data = (2 * np.array(x_data) + np.random.randn(len(x_data))).tolist()
     
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(x_data, y_data, c=color, s=size, alpha=alpha)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Scatter Plot', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel(x_label or 'X Values', fontsize=12)
-    ax.set_ylabel(y_label or 'Y Values', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
+    image = await render_chart(
+        "scatter_plot", x_values=x_data, y_values=y_data, title=title or 'Scatter Plot',
+        x_label=x_label or 'X Values', y_label=y_label or 'Y Values', color=color, size=size, alpha=alpha
+    )
     
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "scatter_plot",
         "data_points": len(x_data),
@@ -1,6 +1,3 @@
-from rich.markdown import Markdown
-from rich.console import Console
-from rich.live import Live
 from dotenv import load_dotenv
 import asyncio
 import pathlib
@@ -9,27 +6,34 @@ import os
 
 from pydantic_ai import Agent
 
-from app.utils import model, MCPClient, FINANCIAL_ANALYST_SYSTEM_PROMPT
+from app.utils.mcp_client import connect_tools
+from app.utils.tool_selector import ToolSelector
+from app.utils import agent_model, FINANCIAL_ANALYST_SYSTEM_PROMPT
+from app.utils.llm_scheduler import BULK
 
 # Get the directory where the current script is located
 SCRIPT_DIR = pathlib.Path(__file__).parent.resolve()
 # Define the path to the config file relative to the script directory
 CONFIG_FILE = SCRIPT_DIR / "mcp_config.json"
 
+# Offered on every turn regardless of the query
+FINANCIAL_ANALYST_PINNED_TOOLS = ["artifact_page", "artifact_filter", "artifact_aggregate"]
+
 load_dotenv()
 
-async def get_financial_analyst():
-    client = MCPClient()
-    client.load_servers(str(CONFIG_FILE))
-    tools = await client.start()
+async def get_financial_analyst(query: str | None = None):
+    """Start the MCP servers (or reuse the warm ones of an active mcp_pool) and build the agent.
 
-    i = 1
-    for tool in tools:
-        print(f"{i}. {tool.name}: {tool.description}")
-        i += 1
+    Args:
+        query: The current user request. When given, only the tools relevant to it
+            (plus the pinned ones) are registered, keeping the prompt small.
+    """
+    client, tools = await connect_tools(str(CONFIG_FILE))
+    if query:
+        tools = ToolSelector(tools, pinned=FINANCIAL_ANALYST_PINNED_TOOLS).select(query)
 
     agent = Agent(
-        model = model,
+        model = agent_model("financial_analyst", BULK),
         system_prompt = FINANCIAL_ANALYST_SYSTEM_PROMPT,
         tools = tools,
         retries=2
@@ -44,6 +48,10 @@ async def get_financial_analyst():
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 async def main():
+    from rich.console import Console
+    from rich.live import Live
+    from rich.markdown import Markdown
+
     print("=== Zerodha CLI Chat ===")
     print("Type 'exit' to quit the chat")
     
@@ -1,6 +1,3 @@
-from rich.markdown import Markdown
-from rich.console import Console
-from rich.live import Live
 from dotenv import load_dotenv
 import asyncio
 import pathlib
@@ -9,19 +6,41 @@ import os
 
 from pydantic_ai import Agent
 
-from app.utils import model, MCPClient, ZERODHA_AGENT_SYSTEM_PROMPT
+from app.utils.mcp_client import connect_tools
+from app.utils.tool_selector import ToolSelector
+from app.utils import agent_model, ZERODHA_AGENT_SYSTEM_PROMPT
+from app.utils.llm_scheduler import INTERACTIVE
 
 # Get the directory where the current script is located
 SCRIPT_DIR = pathlib.Path(__file__).parent.resolve()
 # Define the path to the config file relative to the script directory
 CONFIG_FILE = SCRIPT_DIR / "mcp_config.json"
 
+# Offered on every turn regardless of the query
+ZERODHA_PINNED_TOOLS = ["login", "get_profile", "artifact_page", "artifact_filter", "artifact_aggregate"]
+# User vocabulary -> Kite tool vocabulary, for tool selection
+ZERODHA_QUERY_ALIASES = {
+    "buy": "place order",
+    "sell": "place order",
+    "portfolio": "holdings positions",
+    "stock": "holdings instruments",
+    "price": "ltp quotes",
+    "balance": "margins",
+    "funds": "margins",
+}
+
 load_dotenv()
 
-async def get_zerodha_agent():
-    client = MCPClient()
-    client.load_servers(str(CONFIG_FILE))
-    tools = await client.start()
+async def get_zerodha_agent(query: str | None = None):
+    """Start the MCP servers (or reuse the warm ones of an active mcp_pool) and build the agent.
+
+    Args:
+        query: The current user request. When given, only the tools relevant to it
+            (plus the pinned ones) are registered, keeping the prompt small.
+    """
+    client, tools = await connect_tools(str(CONFIG_FILE))
+    if query:
+        tools = ToolSelector(tools, pinned=ZERODHA_PINNED_TOOLS, aliases=ZERODHA_QUERY_ALIASES).select(query)
 
     # i = 1
     # for tool in tools:
@@ -29,9 +48,9 @@ async def get_zerodha_agent():
     #     i += 1
 
     agent = Agent(
-        model = model,
+        model = agent_model("zerodha_agent", INTERACTIVE),
         system_prompt = ZERODHA_AGENT_SYSTEM_PROMPT,
-        # tools = tools,
+        tools = tools,
         retries=2
     )
 
@@ -44,6 +63,10 @@ async def get_zerodha_agent():
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 async def main():
+    from rich.console import Console
+    from rich.live import Live
+    from rich.markdown import Markdown
+
     print("=== Zerodha CLI Chat ===")
     print("Type 'exit' to quit the chat")
     
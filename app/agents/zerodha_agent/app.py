@@ -2,6 +2,7 @@ import sys
 import os
 import pathlib
 import asyncio
+import concurrent.futures
 from typing import List, Dict, Any
 import traceback
 import threading
@@ -129,6 +130,10 @@ class AsyncRunner:
         try:
             result = future.result(timeout=30)  # 30 second timeout
             return result
+        except concurrent.futures.TimeoutError:
+            # Cancel the coroutine too, otherwise it keeps running on the background loop
+            future.cancel()
+            raise
         except Exception as e:
             raise e
     
@@ -2,8 +2,8 @@ import sys
 import os
 import pathlib
 import asyncio
+import concurrent.futures
 from typing import List, Dict, Any
-import traceback
 import threading
 import queue
 import time
@@ -24,7 +24,11 @@ if sys.platform.startswith('win'):
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 # Import the simplified agentic flow
-from graph import agentic_flow
+from graph import stream_chat
+from app.utils.tracing import configure_tracing
+
+# Record spans to the local trace file; nothing is sent to an external service
+configure_tracing()
 
 st.set_page_config(
     page_title="Investica",
@@ -74,6 +78,10 @@ if "messages" not in st.session_state:
 if "thread_id" not in st.session_state:
     st.session_state.thread_id = str(uuid.uuid4())
 
+# One per browser session, kept across "New Session" so its threads are queued together
+if "user_id" not in st.session_state:
+    st.session_state.user_id = str(uuid.uuid4())
+
 if "background_loop" not in st.session_state:
     st.session_state.background_loop = None
 
@@ -118,9 +126,45 @@ class AsyncRunner:
         try:
             result = future.result(timeout=30)  # 30 second timeout
             return result
+        except concurrent.futures.TimeoutError:
+            # Cancel the coroutine too, otherwise it keeps running on the background loop
+            future.cancel()
+            raise
         except Exception as e:
             raise e
     
+    def stream_async(self, agen, timeout: float = 120):
+        """Iterate an async generator on the background loop, yielding its items as they arrive"""
+        if self.loop is None or not self.loop.is_running():
+            self.start_background_loop()
+            time.sleep(0.2)
+
+        items = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            finally:
+                items.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = items.get(timeout=timeout)
+                if item is done:
+                    break
+                yield item
+            future.result()
+        except queue.Empty:
+            future.cancel()
+            raise concurrent.futures.TimeoutError(f"No progress from the agents for {timeout}s")
+        finally:
+            # Stop the run if the page stopped consuming it (e.g. Streamlit rerun)
+            if not future.done():
+                future.cancel()
+
     def cleanup(self):
         """Clean up the background thread and loop"""
         if self.loop and self.loop.is_running():
@@ -132,35 +176,34 @@ class AsyncRunner:
 if "async_runner" not in st.session_state:
     st.session_state.async_runner = AsyncRunner()
 
-async def get_agentic_response(user_input: str, thread_id: str):
-    """Get response from the agentic flow"""
-    try:
-        print(f"Getting agentic response for: {user_input[:50]}...")
-        
-        # Prepare the config with thread_id for conversation continuity
-        config = {"configurable": {"thread_id": thread_id}}
-        
-        # Create the initial state with user input
-        initial_state = {
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": user_input
-                    }
-                ]
-            }
-        
-        # Get the agent response using the simplified flow
-        result = await agentic_flow.ainvoke(initial_state, config=config)
-        
-        print("Agentic response received successfully")
-        final_message = result["messages"][-1]["content"]
-        return final_message, None
-        
-    except Exception as e:
-        error_msg = f"Error getting agentic response: {str(e)}\n{traceback.format_exc()}"
-        print(f"Agentic response error: {error_msg}")
-        return None, error_msg
+def render_stream(events, status, placeholder):
+    """Render streamed agent events as they arrive and return the final answer"""
+    # Answers streamed by agents running side by side, keyed by node
+    texts, running, text = {}, set(), ""
+    for event in events:
+        kind = event["event"]
+        if kind == "node_start":
+            running.add(event["node"])
+            status.update(label=f"Running {event['node'].replace('_', ' ')}...")
+        elif kind == "node_end":
+            running.discard(event["node"])
+        elif kind == "tool_call":
+            status.write(f"🔧 `{event['tool']}`")
+        elif kind == "tool_result" and not event["ok"]:
+            status.write(f"⚠️ `{event['tool']}` failed")
+        elif kind == "text_delta":
+            # A later agent's answer replaces the earlier ones once they have all finished
+            if event["node"] not in texts and not running & texts.keys():
+                texts = {}
+            texts[event["node"]] = texts.get(event["node"], "") + event["delta"]
+            text = "\n\n---\n\n".join(texts.values())
+            placeholder.markdown(text + "▌")
+        elif kind == "final":
+            text = event["content"]
+        elif kind == "error":
+            raise RuntimeError(event["message"])
+    placeholder.markdown(text)
+    return text
 
 # UI Components
 with st.sidebar:
@@ -222,47 +265,39 @@ if user_input:
     
     # Get agent response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                # Get response from agentic flow using the background thread
-                response_data, error = st.session_state.async_runner.run_async(
-                    get_agentic_response(user_input, st.session_state.thread_id)
-                )
-                
-                if error:
-                    st.error(f"Error: {error}")
-                    assistant_message = f"I encountered an error: {error}"
-                else:
-                    # Extract the response content
-                    if isinstance(response_data, dict):
-                        # If response is a dict, try to get the main content
-                        assistant_message = str(response_data.get('content', response_data.get('response', str(response_data))))
-                    else:
-                        assistant_message = str(response_data) if response_data else "I'm sorry, I couldn't generate a response."
-                
-                st.markdown(assistant_message)
-                
-                assistant_msg = {
-                    "role": "assistant", 
-                    "content": assistant_message
+        status = st.status("Thinking...", expanded=False)
+        placeholder = st.empty()
+        try:
+            # Stream events from the agentic flow running on the background thread
+            assistant_message = render_stream(
+                st.session_state.async_runner.stream_async(
+                    stream_chat(user_input, st.session_state.thread_id, st.session_state.user_id)
+                ),
+                status,
+                placeholder,
+            )
+            status.update(label="Done", state="complete")
+            
+            assistant_msg = {
+                "role": "assistant", 
+                "content": assistant_message
+            }
+            
+            if show_debug:
+                assistant_msg["debug_info"] = {
+                    "thread_id": st.session_state.thread_id,
                 }
-                
-                if show_debug:
-                    assistant_msg["debug_info"] = {
-                        "raw_response": response_data,
-                        "thread_id": st.session_state.thread_id,
-                        "response_type": type(response_data).__name__
-                    }
-                
-                st.session_state.messages.append(assistant_msg)
-                
-            except Exception as e:
-                error_msg = f"Unexpected error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": error_msg
-                })
+            
+            st.session_state.messages.append(assistant_msg)
+            
+        except Exception as e:
+            error_msg = f"Unexpected error: {str(e)}"
+            status.update(label="Error", state="error")
+            st.error(error_msg)
+            st.session_state.messages.append({
+                "role": "assistant", 
+                "content": error_msg
+            })
 
 # Footer
 st.markdown("---")
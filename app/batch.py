@@ -0,0 +1,172 @@
+"""Batch runner for the agentic flow.
+
+Reads JSONL items of ``{"thread_id": ..., "prompt": ...}`` (an optional
+``id`` names the item, otherwise its line number does; an optional
+``user_id`` queues a user's threads together) and runs them through
+the flow with bounded concurrency, sharing warm MCP connections between
+runs. Results are appended to the output JSONL as each item finishes::
+
+    python -m app.batch questions.jsonl -o results.jsonl --concurrency 8
+
+Items of the same thread run one after another in input order, since they
+continue the same conversation; different threads run concurrently. Re-running
+with the same output file resumes: items that already have a successful
+result are skipped, failed ones are tried again.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from app.graph import stream_chat
+from app.utils.llm_scheduler import current_user
+from app.utils.mcp_client import mcp_pool
+from app.utils.tracing import configure_tracing
+
+
+def load_items(path: str | Path) -> List[dict]:
+    """Read the input JSONL, giving every item an ``id`` (its line number unless set)."""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "thread_id" not in item or "prompt" not in item:
+                raise ValueError(f"{path}:{line_number}: items need a thread_id and a prompt")
+            item.setdefault("id", line_number)
+            items.append(item)
+    return items
+
+
+def completed_ids(path: str | Path) -> set:
+    """Ids of the items the output file already holds a successful result for."""
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interruption
+                continue
+            if not record.get("error"):
+                done.add(record["id"])
+    return done
+
+
+def group_by_thread(items: Iterable[dict]) -> List[List[dict]]:
+    threads: dict[str, List[dict]] = defaultdict(list)
+    for item in items:
+        threads[str(item["thread_id"])].append(item)
+    return list(threads.values())
+
+
+async def run_item(item: dict) -> dict:
+    """Run one prompt through the flow and time it, overall and per graph node."""
+    started_at = datetime.now(timezone.utc).isoformat()
+    start, running, nodes = time.perf_counter(), {}, defaultdict(float)
+    answer, error = None, None
+    user_id = str(item["user_id"]) if item.get("user_id") else None
+    current_user.set(user_id)
+    try:
+        async for event in stream_chat(item["prompt"], str(item["thread_id"]), user_id):
+            now = time.perf_counter()
+            if event["event"] == "node_start":
+                running[event["node"]] = now
+            elif event["event"] == "node_end" and event["node"] in running:
+                nodes[event["node"]] += now - running.pop(event["node"])
+            elif event["event"] == "final":
+                answer = event["content"]
+            elif event["event"] == "error":
+                error = event["message"]
+    except Exception as e:
+        error = str(e)
+    return {
+        "id": item["id"],
+        "thread_id": item["thread_id"],
+        "prompt": item["prompt"],
+        "answer": None if error else answer,
+        "error": error,
+        "started_at": started_at,
+        "seconds": round(time.perf_counter() - start, 3),
+        "nodes": {name: round(seconds, 3) for name, seconds in nodes.items()},
+    }
+
+
+class ResultWriter:
+    """Appends results to the output JSONL, flushed per line so an interruption loses nothing finished."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.file = open(path, "a", encoding="utf-8")
+        self.written = 0
+        self.failed = 0
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, default=str) + "\n")
+        self.file.flush()
+        self.written += 1
+        self.failed += bool(record["error"])
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def run_batch(input_path: str, output_path: str, concurrency: int = 8) -> ResultWriter:
+    """Run every pending item of ``input_path``, appending results to ``output_path``.
+
+    Args:
+        input_path: JSONL file of items
+        output_path: JSONL file results are appended to; also used to resume
+        concurrency: Maximum number of threads running at once
+    """
+    items = load_items(input_path)
+    done = completed_ids(output_path)
+    pending = [item for item in items if item["id"] not in done]
+    logging.info(f"Batch: {len(pending)} of {len(items)} items to run, {len(done)} already done")
+
+    writer = ResultWriter(output_path)
+    limit = asyncio.Semaphore(concurrency)
+    total = len(pending)
+
+    async def run_thread(thread_items: List[dict]) -> None:
+        async with limit:
+            for item in thread_items:
+                record = await run_item(item)
+                writer.write(record)
+                status = f"failed: {record['error']}" if record["error"] else "ok"
+                print(f"[{writer.written}/{total}] {record['id']} ({record['seconds']:.1f}s) {status}")
+
+    try:
+        async with mcp_pool():
+            await asyncio.gather(*(run_thread(thread) for thread in group_by_thread(pending)))
+    finally:
+        writer.close()
+    return writer
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run JSONL prompts through the agentic flow")
+    parser.add_argument("input", help="JSONL file of {thread_id, prompt} items")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append results to; re-run to resume")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Threads to run at once")
+    args = parser.parse_args(argv)
+    configure_tracing()
+
+    start = time.perf_counter()
+    writer = asyncio.run(run_batch(args.input, args.output, args.concurrency))
+    print(
+        f"\nFinished {writer.written} items in {time.perf_counter() - start:.1f}s "
+        f"({writer.failed} failed) -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 import os
 import logging
 from functools import lru_cache
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -15,9 +16,84 @@ class Settings(BaseSettings):
     Attributes:
         app_name: Name of the application
         debug: Debug mode flag
+        artifact_dir: Directory for large tool results offloaded from the model context
+        artifact_max_bytes: Total size of the artifact store above which the least recently used artifacts are deleted
+        fast_router_enabled: Route common intents with rules before falling back to the LLM router
+        fast_router_threshold: Minimum confidence for a fast-path routing decision
+        router_shadow_rate: Fraction of fast-path decisions also sent to the LLM router to track agreement
+        history_token_budget: Approximate tokens of verbatim history kept per thread before older turns are summarized
+        history_keep_recent: Number of most recent messages always kept verbatim
+        history_max_message_chars: Message bodies longer than this are moved to the artifact store
+        checkpoint_db_path: SQLite file holding conversation checkpoints
+        checkpoint_keep_last: Checkpoints kept per thread; older ones are pruned
+        checkpoint_thread_ttl: Seconds a conversation may stay idle before its checkpoints are deleted;
+            artifacts unused for as long are deleted with them
+        llm_max_in_flight: Maximum concurrent LLM calls across all agents and users
+        default_model: Model for agents without an entry in agent_models
+        agent_models: Models per agent, preferred first; the others are fallbacks tried in order on errors
+        llm_hedge_agents: Agents whose slow model requests are hedged with a duplicate request
+        llm_hedge_models: Model the duplicate request goes to, per agent; the agent's first model by default
+        llm_hedge_percentile: First-token latency percentile after which a request is hedged
+        llm_hedge_max_rate: Maximum share of an agent's recent requests that may be hedged
+        llm_hedge_initial_delay: Seconds before hedging until enough latencies have been observed
+        llm_cache_enabled: Answer repeated prompts of opted-in agents from the response cache
+        llm_cache_agents: Agents whose model responses are cached
+        llm_cache_path: SQLite file holding cached model responses
+        llm_cache_ttl: Seconds a cached response stays valid
+        llm_cache_max_entries: Cached responses kept; the least recently used are dropped first
+        turn_max_hops: Specialist steps allowed per user message
+        turn_max_seconds: Wall-clock seconds allowed per user message
+        turn_max_tokens: Model tokens the specialists may use per user message
+        turn_max_repeated_routes: Identical dispatches in a row treated as a loop
+        tracing_enabled: Whether spans are recorded to the local trace file
+        trace_file: JSONL file finished spans are appended to
+        trace_file_max_bytes: Size at which the trace file is rotated to ``<trace_file>.1``, replacing the previous one
+        trace_content: Whether prompts, answers and tool arguments are kept in recorded spans
+        chart_render_workers: Worker processes rendering charts off the event loop
     """
     app_name: str = "Portfolio Assessment Agentic AI Backend"
     debug: bool = bool(os.getenv("DEBUG", False))
+    artifact_dir: str = os.getenv("ARTIFACT_DIR", ".artifacts")
+    artifact_max_bytes: int = 1_000_000_000
+    fast_router_enabled: bool = True
+    fast_router_threshold: float = 0.75
+    router_shadow_rate: float = 0.05
+    history_token_budget: int = 3000
+    history_keep_recent: int = 4
+    history_max_message_chars: int = 6000
+    checkpoint_db_path: str = os.getenv("CHECKPOINT_DB", "checkpoints.sqlite")
+    checkpoint_keep_last: int = 20
+    checkpoint_thread_ttl: float = 24 * 3600
+    llm_max_in_flight: int = int(os.getenv("LLM_MAX_IN_FLIGHT", 8))
+    default_model: str = os.getenv("LLM_MODEL", "openai:gpt-4o-mini")
+    # Small and fast for routing and bookkeeping, larger for analysis and trading
+    agent_models: Dict[str, List[str]] = {
+        "router_agent": ["openai:gpt-4o-mini"],
+        "summary_agent": ["openai:gpt-4o-mini"],
+        "chart_agent": ["openai:gpt-4o-mini"],
+        "end_conversation_agent": ["openai:gpt-4o", "openai:gpt-4o-mini"],
+        "zerodha_agent": ["openai:gpt-4o", "openai:gpt-4o-mini"],
+        "financial_analyst": ["openai:gpt-4o", "openai:gpt-4o-mini"],
+    }
+    llm_hedge_agents: List[str] = []
+    llm_hedge_models: Dict[str, str] = {}
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_max_rate: float = 0.1
+    llm_hedge_initial_delay: float = 5.0
+    llm_cache_enabled: bool = True
+    llm_cache_agents: List[str] = ["router_agent", "summary_agent", "end_conversation_agent"]
+    llm_cache_path: str = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+    llm_cache_ttl: float = 3600
+    llm_cache_max_entries: int = 2000
+    turn_max_hops: int = 5
+    turn_max_seconds: float = 120
+    turn_max_tokens: int = 60000
+    turn_max_repeated_routes: int = 3
+    tracing_enabled: bool = True
+    trace_file: str = os.getenv("TRACE_FILE", ".traces/spans.jsonl")
+    trace_file_max_bytes: int = 50_000_000
+    trace_content: bool = False
+    chart_render_workers: int = int(os.getenv("CHART_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
 
 
 @lru_cache()
@@ -35,7 +111,7 @@ logging.basicConfig(
     level=logging.INFO if not get_settings().debug else logging.DEBUG,
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[
-        logging.FileHandler("app.log"),
+        logging.FileHandler("app.log", delay=True),
         logging.StreamHandler()
     ]
 ) 
\ No newline at end of file
@@ -1,44 +1,229 @@
 from pydantic_ai import Agent
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from typing import TypedDict, Annotated, List
-from langgraph.types import interrupt
+from typing import TypedDict, Annotated, AsyncIterator, List, Literal
+from pydantic import BaseModel, Field
+from langgraph.types import Send, interrupt
+from langchain_core.runnables import RunnableConfig
 from dotenv import load_dotenv
+from functools import lru_cache
 import logfire
 import asyncio
+import getpass
+import random
+import time
 import uuid
 
-from app.utils import model
-from app.agents import get_zerodha_agent
+from app.core.config import get_settings
+from app.utils import agent_model
+from app.utils.llm_scheduler import INTERACTIVE, ROUTING, current_user
+from app.utils.response_cache import cached_model
+from app.utils.checkpointer import SQLiteSaver
+from app.utils.compaction import (
+    HISTORY_COMPACTIONS,
+    REMOVE_ALL_MESSAGES,
+    current_turn_start,
+    estimate_tokens,
+    fallback_summary,
+    format_transcript,
+    merge_messages,
+    render_history,
+    replace_large_payloads,
+    split_for_budget,
+)
+from app.utils.fast_router import (
+    END_CONVERSATION,
+    FINANCIAL_ANALYST,
+    MULTI_MARKET,
+    ZERODHA_AGENT,
+    FastRouter,
+    ROUTER_DECISIONS,
+)
+from app.utils.metrics import track_agent_run
+from app.utils.streaming import run_agent_streamed, stream_node
+from app.utils.turn_budget import TurnLimits, record_trip
 
 # Load environment variables
 load_dotenv()
 
-# Configure logfire to suppress warnings (optional)
-logfire.configure(send_to_logfire='never')
+# Agents are built on first use, so importing the graph does not load the model clients
+@lru_cache()
+def get_router_agent() -> Agent:
+    return Agent(
+        model = cached_model(agent_model("router_agent", ROUTING), "router_agent"),
+        system_prompt='Your job is to route the user to the relevant agent.',
+    )
 
-router_agent = Agent(  
-    model = model,
-    system_prompt='Your job is to route the user to the relevant agent.',  
-)
+@lru_cache()
+def get_end_conversation_agent() -> Agent:
+    return Agent(
+        model = cached_model(agent_model("end_conversation_agent", INTERACTIVE), "end_conversation_agent"),
+        system_prompt='Your job is to end a conversation and summarize the whole conversation.',
+    )
 
-end_conversation_agent = Agent(  
-    model = model,
-    system_prompt='Your job is to end a conversation and summarize the whole conversation.',  
-)
+@lru_cache()
+def get_summary_agent() -> Agent:
+    return Agent(
+        model = cached_model(agent_model("summary_agent", ROUTING), "summary_agent"),
+        system_prompt='Your job is to maintain a running summary of a conversation between a user and trading agents.',
+    )
+
+settings = get_settings()
+fast_router = FastRouter(threshold=settings.fast_router_threshold)
+# Keeps shadow routing tasks alive until they finish
+_shadow_tasks: set[asyncio.Task] = set()
+
+# Specialist nodes each routing label fans out to, in display order
+SPECIALISTS = {
+    ZERODHA_AGENT: [ZERODHA_AGENT],
+    FINANCIAL_ANALYST: [FINANCIAL_ANALYST],
+    MULTI_MARKET: [ZERODHA_AGENT, FINANCIAL_ANALYST],
+}
+# Shorter "final" answers are treated as not user-ready (e.g. "Done.") and get summarized
+MIN_FINAL_ANSWER_CHARS = 20
+SPECIALIST_TITLES = {
+    ZERODHA_AGENT: "Indian markets (Kite)",
+    FINANCIAL_ANALYST: "US markets and fundamentals",
+}
 
 # Define state schema
 class AgentState(TypedDict):
-    messages: Annotated[List[dict], lambda x, y: x + y]
+    messages: Annotated[List[dict], merge_messages]
+    # Running summary of the turns compacted out of messages
+    summary: str
+    # Outputs of the specialists that ran in the current step, combined by merge_results
+    results: Annotated[List[dict], merge_messages]
+    # Specialists that asked for another hop; set by merge_results
+    pending: List[str]
+    # Whether the merged answer is ready for the user as is; set by merge_results
+    final: bool
+    # Per-turn budget accounting, reset when a new user message arrives
+    turn_started_at: float
+    hops: int
+    turn_tokens: int
+    # Specialist sets dispatched by merge_results this turn, for loop detection
+    decisions: List[str]
+    # Limit that cut the turn short, if any
+    stop_reason: str
+
+class AgentReply(BaseModel):
+    """Structured output of agent nodes: the answer and the routing decision in one call."""
+    answer: str = Field(description="Your response to the user, in markdown.")
+    next: Literal["continue", "end_conversation"] = Field(
+        description=(
+            "'continue' only if you must call more tools yourself to finish the request; "
+            "'end_conversation' once the answer is complete or you need input from the user."
+        )
+    )
+    final: bool = Field(
+        default=False,
+        description=(
+            "True if the answer can be shown to the user exactly as written: complete, well formatted "
+            "and addressed to the user. False if it still needs to be summarized for them."
+        ),
+    )
+
+async def compact_history(state: AgentState, config: RunnableConfig):
+    """Keep the verbatim history within the thread's token budget.
+
+    Oversized messages of earlier turns are moved to the artifact store and
+    the oldest turns are folded into the running summary, so prompts built
+    from the state stay about the same size however long the thread runs.
+    The current turn, starting at the latest user message, is left as is so
+    the agents see what the user actually asked. The budget can be set per
+    thread with ``config["configurable"]["history_token_budget"]``.
+
+    As the first node of every turn it also resets the turn's budget counters.
+    """
+    update = {"turn_started_at": time.time(), "hops": 0, "turn_tokens": 0, "decisions": [], "stop_reason": ""}
+    budget = config.get("configurable", {}).get("history_token_budget", settings.history_token_budget)
+    summary = state.get("summary", "")
+    start = current_turn_start(state["messages"])
+    history, offloaded = replace_large_payloads(state["messages"][:start], settings.history_max_message_chars)
+    if offloaded:
+        HISTORY_COMPACTIONS.inc(kind="offloaded")
+    messages = history + state["messages"][start:]
+
+    # The summary is capped at a quarter of the budget; the rest is for recent turns
+    summary_budget = budget // 4
+    older, recent = split_for_budget(
+        messages, budget - min(estimate_tokens(summary), summary_budget), settings.history_keep_recent
+    )
+    if len(older) > start:
+        older, recent = messages[:start], messages[start:]
+    if not older and not offloaded:
+        return update
+    if older:
+        summary = await summarize(summary, older, summary_budget)
+    return {**update, "messages": [REMOVE_ALL_MESSAGES, *recent], "summary": summary}
+
+async def summarize(summary: str, older: List[dict], max_tokens: int) -> str:
+    """Fold compacted turns into the running summary, falling back to an extractive one."""
+    prompt = f"""Update the running summary with the new conversation turns below. Keep facts the user or agents may refer back to: holdings, symbols, quantities, prices, orders placed and open questions. Answer with the updated summary only, in at most {max_tokens * 3 // 4} words.
+
+    Current summary:
+    {summary or "(empty)"}
+
+    New turns:
+    {format_transcript(older)}
+    """
+    try:
+        with track_agent_run("summary_agent"):
+            result = await get_summary_agent().run(prompt)
+        HISTORY_COMPACTIONS.inc(kind="summarized")
+        return result.output
+    except Exception as e:
+        print(f"\n[Error] Summarizing history failed: {str(e)}")
+        HISTORY_COMPACTIONS.inc(kind="summary_fallback")
+        return fallback_summary(summary, older, max_tokens)
+
+def dispatch(label: str, state: AgentState):
+    """Fan a routing label out to its specialists, all in the same step, or end the turn."""
+    if label in SPECIALISTS:
+        return [Send(node, state) for node in SPECIALISTS[label]]
+    return END_CONVERSATION
 
 async def router_agen(state: AgentState):
+    """Pick the specialists for this turn and dispatch them."""
+    with logfire.span("graph route") as span:
+        label = await route(state)
+        span.set_attribute("label", label)
+    return dispatch(label, state)
+
+async def route(state: AgentState) -> str:
+    """Route with the fast-path rules when they are confident, otherwise ask the LLM router."""
+    decision = fast_router.classify(state['messages']) if settings.fast_router_enabled else None
+
+    if decision is not None and fast_router.is_confident(decision):
+        ROUTER_DECISIONS.inc(source="fast")
+        if random.random() < settings.router_shadow_rate:
+            task = asyncio.create_task(shadow_route(state, decision.label))
+            _shadow_tasks.add(task)
+            task.add_done_callback(_shadow_tasks.discard)
+        return decision.label
+
+    ROUTER_DECISIONS.inc(source="llm")
+    next_action = await llm_route(state)
+    if decision is not None and decision.label is not None:
+        fast_router.record_agreement(decision.label, next_action)
+    return next_action
+
+async def shadow_route(state: AgentState, fast_label: str):
+    """Ask the LLM router in the background and record whether it agrees with the fast path."""
+    try:
+        fast_router.record_agreement(fast_label, await llm_route(state))
+    except Exception as e:
+        print(f"\n[Error] Shadow routing failed: {str(e)}")
+
+async def llm_route(state: AgentState):
     prompt = f"""
         Based on the conversation till now, your task is to route to which agent we should go.
 
-        {state['messages']}
+        {render_history(state.get('summary', ''), state['messages'])}
 
         List of available agents:
-        "zerodha_agent": It is capable of doing trade execution, market anaylsis and post-trade tasks.
+        "zerodha_agent": It is capable of doing trade execution, market anaylsis and post-trade tasks on the user's Indian (Kite) account.
+        "financial_analyst": It provides US stock and crypto prices, company fundamentals, news and SEC filings.
+        "multi_market": Runs both agents above at once, for questions that need the Kite account and US market data together.
         "end_conversation_agent:" It's task is to end the conversation and provide the final result.
 
         Output should the name of the agent which is chosen.
@@ -46,45 +231,150 @@ async def router_agen(state: AgentState):
         Example Outputs:
         "end_conversation_agent"
         "zerodha_agent"
+        "financial_analyst"
+        "multi_market"
     """
 
-    result = await router_agent.run(prompt)
-    next_action = result.output
+    with track_agent_run("router_agent"):
+        result = await get_router_agent().run(prompt)
+    next_action = result.output.strip().strip('"')
 
-    if next_action == "zerodha_agent":
-        return "zerodha_agent"
+    if next_action in SPECIALISTS:
+        return next_action
     else:
-        return "end_conversation"
+        return END_CONVERSATION
 
-async def zerodga_agent(state: AgentState):
-    mcp_client, mcp_agent = await get_zerodha_agent()
-    
+def latest_user_prompt(messages: List[dict]) -> str:
+    """Return the content of the most recent user message."""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+def agent_prompt(state: AgentState) -> str:
+    """Build the agent prompt: the latest request, with the compacted conversation as context."""
+    request = latest_user_prompt(state['messages'])
+    if len(state['messages']) <= 1 and not state.get('summary'):
+        return request
+    return f"""This is the conversation so far:
+    {render_history(state.get('summary', ''), state['messages'])}
+
+    Continue with the user's latest request: {request}
+    """
+
+async def run_specialist(name: str, get_agent, state: AgentState, config: RunnableConfig):
+    """Run one specialist agent on the current request and report its output for merge_results.
+
+    The run is cut off when the turn's wall-clock budget runs out.
+    """
+    limits = TurnLimits.from_config(config)
+    remaining = limits.max_seconds - (time.time() - state.get("turn_started_at", time.time()))
+    mcp_client = None
     try:
-            result = await mcp_agent.run(state['messages'][-1], message_history=state['messages'][:-1])
-            
-            # Add the new messages to the chat history
-            return {
-                "messages": [
-                    {
-                        "role": "assistant", 
-                        "content": result.output
-                    }
-                ]
-            }
+        async with asyncio.timeout(max(remaining, 0)):
+            mcp_client, mcp_agent = await get_agent(latest_user_prompt(state['messages']))
+            with track_agent_run(name):
+                result = await run_agent_streamed(mcp_agent, agent_prompt(state), name, output_type=AgentReply)
+        return {"results": [{
+            "agent": name,
+            "answer": result.output.answer,
+            "next": result.output.next,
+            "final": result.output.final,
+            "tokens": result.usage().total_tokens or 0,
+        }]}
+    except TimeoutError:
+        print(f"\n[Error] {name} ran out of the turn's time budget")
+        return {"results": [{"agent": name, "error": "timed out", "timed_out": True}]}
     except Exception as e:
-        print(f"\n[Error] An error occurred: {str(e)}")
+        print(f"\n[Error] An error occurred in {name}: {str(e)}")
+        return {"results": [{"agent": name, "error": str(e)}]}
     finally:
-        await mcp_client.cleanup()
+        if mcp_client is not None:
+            await mcp_client.cleanup()
+
+async def zerodga_agent(state: AgentState, config: RunnableConfig):
+    # Imported here so the MCP stack loads with the first specialist run, not with the graph
+    from app.agents import get_zerodha_agent
+    return await run_specialist(ZERODHA_AGENT, get_zerodha_agent, state, config)
+
+async def financial_analyst(state: AgentState, config: RunnableConfig):
+    from app.agents import get_financial_analyst
+    return await run_specialist(FINANCIAL_ANALYST, get_financial_analyst, state, config)
+
+async def merge_results(state: AgentState, config: RunnableConfig):
+    """Combine the answers of the specialists that ran in parallel into one assistant message.
+
+    Also charges the step to the turn's budget. If the turn would go on past
+    a hop, time, token or loop limit, no specialist is sent back in and the
+    turn is wrapped up by end_conversation instead.
+    """
+    order = list(SPECIALIST_TITLES)
+    all_results = state.get("results", [])
+    results = sorted(
+        (result for result in all_results if result.get("answer")),
+        key=lambda result: order.index(result["agent"]) if result["agent"] in order else len(order),
+    )
+    pending = [result["agent"] for result in results if result.get("next") == "continue"]
+    hops = state.get("hops", 0) + 1
+    tokens = state.get("turn_tokens", 0) + sum(result.get("tokens", 0) for result in all_results)
+    decisions = state.get("decisions", []) + (["+".join(sorted(pending))] if pending else [])
+    update = {
+        "results": [REMOVE_ALL_MESSAGES],
+        "pending": pending,
+        "final": bool(results) and all(is_user_ready(result) for result in results),
+        "hops": hops,
+        "turn_tokens": tokens,
+        "decisions": decisions,
+    }
+
+    if pending or any(result.get("timed_out") for result in all_results):
+        limits = TurnLimits.from_config(config)
+        elapsed = time.time() - state.get("turn_started_at", time.time())
+        if reason := limits.exceeded(hops, elapsed, tokens, decisions):
+            record_trip(reason, config.get("configurable", {}).get("thread_id"))
+            update.update(pending=[], final=False, stop_reason=reason)
+    if len(results) == 1:
+        update["messages"] = [{"role": "assistant", "content": results[0]["answer"]}]
+    elif results:
+        content = "\n\n".join(
+            f"### {SPECIALIST_TITLES.get(result['agent'], result['agent'])}\n\n{result['answer']}"
+            for result in results
+        )
+        update["messages"] = [{"role": "assistant", "content": content}]
+    return update
+
+def is_user_ready(result: dict) -> bool:
+    """Whether a specialist's answer can go to the user without the end_conversation pass."""
+    answer = result.get("answer", "").strip()
+    return bool(result.get("final")) and result.get("next") != "continue" and len(answer) >= MIN_FINAL_ANSWER_CHARS
+
+def route_after_merge(state: AgentState):
+    """Send the specialists that asked for another hop back in, otherwise finish the turn.
+
+    Answers the specialists marked final are already shown to the user as the
+    merged message, so the end_conversation summary pass is skipped for them.
+    """
+    if pending := state.get("pending"):
+        return [Send(node, state) for node in pending]
+    if state.get("final"):
+        return END
+    return END_CONVERSATION
 
 # End of conversation agent to give instructions for executing the agent
 async def end_conversation(state: AgentState):
+    stopped = ""
+    if state.get("stop_reason"):
+        stopped = f"""
+    The agents were stopped before they finished ({state['stop_reason']} limit reached). Present what they found so far and tell the user what is still missing.
+    """
     prompt = f"""Summarize the conversation and give the final output, ther user will see only your output, so make you sure you present a good, concise yet clear output. You may make tables, charts or any other form of visual representaiton of the data to make the output more appealing.
-    
+    {stopped}
     This is the conversation:
-    {state['messages']}
+    {render_history(state.get('summary', ''), state['messages'])}
     """
 
-    result = await end_conversation_agent.run(prompt)
+    with track_agent_run("end_conversation_agent"):
+        result = await run_agent_streamed(get_end_conversation_agent(), prompt, "end_conversation")
     return {
         "messages": [
             {
@@ -97,31 +387,68 @@ async def end_conversation(state: AgentState):
 builder = StateGraph(AgentState)
 
 # Add nodes
-builder.add_node("zerodha_agent", zerodga_agent)
-builder.add_node("end_conversation", end_conversation)
+builder.add_node("compact_history", stream_node("compact_history", compact_history))
+builder.add_node("zerodha_agent", stream_node("zerodha_agent", zerodga_agent))
+builder.add_node("financial_analyst", stream_node("financial_analyst", financial_analyst))
+builder.add_node("merge_results", stream_node("merge_results", merge_results))
+builder.add_node("end_conversation", stream_node("end_conversation", end_conversation))
 
 # Set edges
+builder.add_edge(START, "compact_history")
 builder.add_conditional_edges(
-    START,
+    "compact_history",
     router_agen,
-    {
-        "zerodha_agent": "zerodha_agent", 
-        "end_conversation": "end_conversation"
-    }
+    ["zerodha_agent", "financial_analyst", "end_conversation"]
 )
+# Specialists dispatched together finish in the same step and are merged once
+builder.add_edge("zerodha_agent", "merge_results")
+builder.add_edge("financial_analyst", "merge_results")
 builder.add_conditional_edges(
-    "zerodha_agent",
-    router_agen,
-    {
-        "zerodha_agent": "zerodha_agent", 
-        "end_conversation": "end_conversation"
-    }
+    "merge_results",
+    route_after_merge,
+    ["zerodha_agent", "financial_analyst", "end_conversation", END]
 )
 builder.add_edge("end_conversation", END)
 
-# Configure persistence
-memory = MemorySaver()
-agentic_flow = builder.compile(checkpointer=memory)
+@lru_cache()
+def get_agentic_flow():
+    """The compiled flow, with its SQLite checkpointer opened on first use rather than on import."""
+    return builder.compile(checkpointer=SQLiteSaver.from_config())
+
+async def stream_chat(user_input: str, thread_id: str, user_id: str | None = None) -> AsyncIterator[dict]:
+    """Run the agentic flow for one user message and yield its progress events as they happen.
+
+    Yields the events documented in app.utils.streaming, then a ``final``
+    event with the answer shown to the user (or an ``error`` event).
+
+    Args:
+        user_input: The user's message
+        thread_id: Conversation to continue
+        user_id: Who the message is from, so the LLM scheduler queues all of a
+            user's threads together; the thread stands in for the user if not given
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    if user_id:
+        config["configurable"]["user_id"] = user_id
+    initial_state = {"messages": [{"role": "user", "content": user_input}]}
+    final_message = None
+    try:
+        with logfire.span("chat turn", thread_id=thread_id, prompt_chars=len(user_input)):
+            async for mode, chunk in get_agentic_flow().astream(
+                initial_state, config=config, stream_mode=["custom", "updates"]
+            ):
+                if mode == "custom":
+                    yield chunk
+                    continue
+                for update in chunk.values():
+                    for message in (update or {}).get("messages", []):
+                        if message.get("role") == "assistant":
+                            final_message = message["content"]
+    except Exception as e:
+        print(f"\n[Error] Streaming the agentic flow failed: {str(e)}")
+        yield {"event": "error", "message": str(e)}
+        return
+    yield {"event": "final", "content": final_message or "I'm sorry, I couldn't generate a response."}
 
 async def run_cli():
     """Interactive CLI for testing the agentic flow"""
@@ -135,8 +462,10 @@ async def run_cli():
     print("=" * 50)
     
     # Generate a unique thread ID for this session
+    user_id = getpass.getuser()
+    current_user.set(user_id)
     thread_id = str(uuid.uuid4())
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": thread_id, "user_id": user_id}}
     
     while True:
         try:
@@ -149,7 +478,7 @@ async def run_cli():
                 break
             elif user_input.lower() == 'clear':
                 thread_id = str(uuid.uuid4())
-                config = {"configurable": {"thread_id": thread_id}}
+                config = {"configurable": {"thread_id": thread_id, "user_id": user_id}}
                 print("\n🔄 New conversation started!")
                 continue
             elif user_input.lower() == 'help':
@@ -176,7 +505,8 @@ async def run_cli():
             print("\n🤖 Processing...")
             
             # Run the agentic flow
-            result = await agentic_flow.ainvoke(initial_state, config=config)
+            with logfire.span("chat turn", thread_id=thread_id, prompt_chars=len(user_input)):
+                result = await get_agentic_flow().ainvoke(initial_state, config=config)
             
             # Display the final response
             if result and "messages" in result:
@@ -193,4 +523,7 @@ async def run_cli():
             print("Please try again or type 'quit' to exit.")
 
 if __name__ == "__main__":
+    from app.utils.tracing import configure_tracing
+
+    configure_tracing()
     asyncio.run(run_cli())
\ No newline at end of file
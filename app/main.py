@@ -1,11 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+import uuid
 
 from app.core.config import get_settings
+from app.graph import stream_chat
+from app.utils.llm_scheduler import current_user
+from app.utils.metrics import CONTENT_TYPE_LATEST, REGISTRY
+from app.utils.streaming import sse
+from app.utils.tracing import configure_tracing
 
 # Get application settings
 settings = get_settings()
 
+# Record spans to the local trace file; nothing is sent to an external service
+configure_tracing()
+
 # Create FastAPI app
 app = FastAPI(
     title="Portfolio Assessment Agentic AI API",
@@ -45,6 +56,45 @@ async def health_check():
     return {"status": "Everything is healthy"}
 
 
+@app.get("/metrics", tags=["monitoring"], response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for MCP tool calls and agent runs."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+class ChatRequest(BaseModel):
+    """A user message; reuse thread_id to continue a conversation.
+
+    user_id groups a user's threads for fair queuing of model calls; without
+    it each thread is queued as its own user.
+    """
+    message: str
+    thread_id: str | None = None
+    user_id: str | None = None
+
+
+@app.post("/chat/stream", tags=["chat"])
+async def chat_stream(request: ChatRequest):
+    """Run the agentic flow and stream its progress as server-sent events.
+
+    Events: thread, node_start, node_end, tool_call, tool_result, text_delta,
+    then final (or error).
+    """
+    thread_id = request.thread_id or str(uuid.uuid4())
+
+    async def events():
+        current_user.set(request.user_id)
+        yield sse({"event": "thread", "thread_id": thread_id})
+        async for event in stream_chat(request.message, thread_id, request.user_id):
+            yield sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # Run with: uvicorn app.main:app --reload
 if __name__ == "__main__":
     import uvicorn
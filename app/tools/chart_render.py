@@ -0,0 +1,118 @@
+"""Chart renderers run in the chart worker processes (see app.tools.charts).
+
+Each renderer draws on its own ``Figure`` with an Agg canvas instead of going
+through pyplot, so no global figure state is involved, and returns the PNG as
+base64. Only the worker processes import this module and matplotlib.
+"""
+
+from typing import Dict, List, Optional, Union
+import base64
+import io
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DPI = 300
+
+
+def _axes(figsize=(10, 6)):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _labels(ax, title: str, x_label: Optional[str], y_label: Optional[str]) -> None:
+    ax.set_title(title, fontsize=16, fontweight='bold')
+    if x_label is not None:
+        ax.set_xlabel(x_label, fontsize=12)
+    if y_label is not None:
+        ax.set_ylabel(y_label, fontsize=12)
+
+
+def _png_base64(fig: Figure) -> str:
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+
+def histogram(data: List[float], title: str, bins: int = 30, x_label: str = 'Values',
+              y_label: str = 'Frequency', color: str = 'skyblue') -> str:
+    fig, ax = _axes()
+    ax.hist(data, bins=bins, color=color, alpha=0.7, edgecolor='black')
+    _labels(ax, title, x_label, y_label)
+    ax.grid(True, alpha=0.3)
+    return _png_base64(fig)
+
+
+def bar_chart(categories: List[str], values: List[float], title: str, x_label: str = 'Categories',
+              y_label: str = 'Values', color: str = 'steelblue', alpha: float = 0.7,
+              horizontal: bool = False) -> str:
+    fig, ax = _axes()
+    if horizontal:
+        ax.barh(categories, values, color=color, alpha=alpha)
+        _labels(ax, title, y_label, x_label)
+    else:
+        ax.bar(categories, values, color=color, alpha=alpha)
+        _labels(ax, title, x_label, y_label)
+        setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, axis='x' if horizontal else 'y')
+    return _png_base64(fig)
+
+
+def pie_chart(labels: List[str], sizes: List[float], title: str) -> str:
+    fig, ax = _axes(figsize=(8, 8))
+    colors = colormaps['Set3'](np.linspace(0, 1, len(labels)))
+    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    _labels(ax, title, None, None)
+    ax.axis('equal')
+    return _png_base64(fig)
+
+
+def line_chart(x_values: List, y_values: List, title: str, x_label: str = 'X Values',
+               y_label: str = 'Y Values', color: str = 'blue', line_style: str = '-',
+               marker: str = 'o', markersize: float = 6, linewidth: Optional[float] = None) -> str:
+    fig, ax = _axes()
+    ax.plot(x_values, y_values, color=color, linestyle=line_style, marker=marker,
+            markersize=markersize, linewidth=linewidth)
+    _labels(ax, title, x_label, y_label)
+    ax.grid(True, alpha=0.3)
+    return _png_base64(fig)
+
+
+def scatter_plot(x_values: List[float], y_values: List[float], title: str, x_label: str = 'X Values',
+                 y_label: str = 'Y Values', color: str = 'red', size: Union[int, List[int]] = 50,
+                 alpha: float = 0.6) -> str:
+    fig, ax = _axes()
+    ax.scatter(x_values, y_values, c=color, s=size, alpha=alpha)
+    _labels(ax, title, x_label, y_label)
+    ax.grid(True, alpha=0.3)
+    return _png_base64(fig)
+
+
+def box_plot(data_dict: Dict[str, List[float]], title: str, x_label: str = 'Categories',
+             y_label: str = 'Values') -> str:
+    fig, ax = _axes()
+    ax.boxplot(list(data_dict.values()), tick_labels=list(data_dict.keys()))
+    _labels(ax, title, x_label, y_label)
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(True, alpha=0.3)
+    return _png_base64(fig)
+
+
+RENDERERS = {
+    "histogram": histogram,
+    "bar_chart": bar_chart,
+    "pie_chart": pie_chart,
+    "line_chart": line_chart,
+    "scatter_plot": scatter_plot,
+    "box_plot": box_plot,
+}
+
+
+def render(kind: str, options: dict) -> str:
+    """Render a chart of the given kind and return the PNG as base64."""
+    return RENDERERS[kind](**options)
@@ -1,265 +1,227 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-import numpy as np
-from typing import List, Dict, Optional
-import json
-import base64
-import io
-from datetime import datetime
-
-plt.style.use('default')
-sns.set_palette("husl")
-
-plt.ioff()
-
-def create_histogram(data: List[float], 
-                    title: Optional[str] = None,
-                    bins: int = 30) -> Dict[str, str]:
+"""Chart tools rendering off the event loop.
+
+Rendering a chart at 300 dpi takes hundreds of milliseconds of CPU, and
+pyplot's global state is not thread-safe, so charts are drawn in a pool of
+worker processes (app.tools.chart_render) and awaited. Several charts render
+in parallel across cores while other sessions keep running.
+"""
+
+from functools import lru_cache
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import multiprocessing
+import time
+
+import logfire
+
+from app.core.config import get_settings
+from app.utils.metrics import histogram
+
+CHART_RENDER_LATENCY = histogram(
+    "chart_render_seconds", "Chart render latency by chart type, including waiting for a worker.", ["chart_type"]
+)
+
+
+def _warm_worker() -> None:
+    # Import matplotlib when the worker starts rather than on its first chart
+    import app.tools.chart_render  # noqa: F401
+
+
+def _render_in_worker(kind: str, options: dict) -> str:
+    from app.tools.chart_render import render
+
+    return render(kind, options)
+
+
+@lru_cache()
+def get_render_pool() -> Pool:
+    """The chart worker pool, started on first use with ``Settings.chart_render_workers`` processes.
+
+    Workers are not forked from the app process, which runs an event loop and
+    exporter threads that must not be copied into a child. Where available
+    they fork from a fork server that has already imported matplotlib;
+    otherwise they are spawned. Either way each worker imports the main
+    module once, as multiprocessing requires, so entry points must keep
+    their start-up under ``if __name__ == "__main__"``.
+
+    This is a ``multiprocessing`` pool rather than a ``ProcessPoolExecutor``:
+    logfire patches the executor's ``submit`` to ship its configuration to
+    every task, which cannot be pickled once span processors are attached.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["app.tools.chart_render"])
+    else:
+        context = multiprocessing.get_context("spawn")
+    return context.Pool(get_settings().chart_render_workers, initializer=_warm_worker)
+
+
+async def _run_in_pool(pool: Pool, func: Callable[..., Any], *args: Any) -> Any:
+    """Run ``func(*args)`` in a worker of ``pool`` and await its result without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def resolve(set_outcome: Callable[[Any], None], outcome: Any) -> None:
+        if not future.done():
+            set_outcome(outcome)
+
+    # The callbacks run on the pool's result thread, so hand the outcome back to the loop
+    pool.apply_async(
+        func,
+        args,
+        callback=lambda result: loop.call_soon_threadsafe(resolve, future.set_result, result),
+        error_callback=lambda error: loop.call_soon_threadsafe(resolve, future.set_exception, error),
+    )
+    return await future
+
+
+async def render_chart(kind: str, **options) -> str:
+    """Render a chart in the worker pool and return the PNG as base64.
+
+    Args:
+        kind: Renderer name in app.tools.chart_render, e.g. "histogram"
+        **options: Arguments of that renderer
+    """
+    start = time.perf_counter()
+    with logfire.span("chart render {chart_type}", chart_type=kind):
+        image = await _run_in_pool(get_render_pool(), _render_in_worker, kind, options)
+    CHART_RENDER_LATENCY.observe(time.perf_counter() - start, chart_type=kind)
+    return image
+
+
+async def create_histogram(data: List[float],
+                           title: Optional[str] = None,
+                           bins: int = 30) -> Dict[str, str]:
     """
     Create a histogram for numerical data distribution.
-    
+
     Args:
         data: List of numerical values
         title: Chart title (optional)
         bins: Number of bins (default: 30)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.hist(data, bins=bins, color='skyblue', alpha=0.7, edgecolor='black')
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Distribution Histogram', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel('Values', fontsize=12)
-    ax.set_ylabel('Frequency', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart("histogram", data=data, title=title or 'Distribution Histogram', bins=bins)
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "histogram",
         "data_points": len(data)
     }
 
-def create_bar_chart(categories: List[str], 
-                    values: List[float],
-                    title: Optional[str] = None) -> Dict[str, str]:
+async def create_bar_chart(categories: List[str],
+                           values: List[float],
+                           title: Optional[str] = None) -> Dict[str, str]:
     """
     Create a bar chart for categorical data comparison.
-    
+
     Args:
         categories: List of category names
         values: List of corresponding values
         title: Chart title (optional)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(categories, values, color='steelblue', alpha=0.8)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Bar Chart Comparison', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel('Categories', fontsize=12)
-    ax.set_ylabel('Values', fontsize=12)
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    ax.grid(True, alpha=0.3, axis='y')
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart(
+        "bar_chart", categories=categories, values=values, title=title or 'Bar Chart Comparison', alpha=0.8
+    )
     return {
-        "image": image_base64,
-        "mime_type": "image/png", 
+        "image": image,
+        "mime_type": "image/png",
         "chart_type": "bar_chart",
         "categories": len(categories)
     }
 
-def create_pie_chart(labels: List[str], 
-                    sizes: List[float],
-                    title: Optional[str] = None) -> Dict[str, str]:
+async def create_pie_chart(labels: List[str],
+                           sizes: List[float],
+                           title: Optional[str] = None) -> Dict[str, str]:
     """
     Create a pie chart for proportional data.
-    
+
     Args:
         labels: List of category labels
         sizes: List of corresponding values/sizes
         title: Chart title (optional)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(8, 8))
-    colors = plt.cm.Set3(np.linspace(0, 1, len(labels)))
-    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Proportional Distribution', fontsize=16, fontweight='bold')
-    
-    ax.axis('equal')
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart("pie_chart", labels=labels, sizes=sizes, title=title or 'Proportional Distribution')
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
-        "chart_type": "pie_chart", 
+        "chart_type": "pie_chart",
         "segments": len(labels)
     }
 
-def create_line_chart(x_values: List, 
-                     y_values: List,
-                     title: Optional[str] = None) -> Dict[str, str]:
+async def create_line_chart(x_values: List,
+                            y_values: List,
+                            title: Optional[str] = None) -> Dict[str, str]:
     """
     Create a line chart for trend analysis.
-    
+
     Args:
         x_values: X-axis data points
-        y_values: Y-axis data points  
+        y_values: Y-axis data points
         title: Chart title (optional)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.plot(x_values, y_values, color='blue', marker='o', linewidth=2, markersize=6)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Trend Analysis', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel('X Values', fontsize=12)
-    ax.set_ylabel('Y Values', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart(
+        "line_chart", x_values=x_values, y_values=y_values, title=title or 'Trend Analysis', linewidth=2
+    )
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "line_chart",
         "data_points": len(x_values)
     }
 
-def create_scatter_plot(x_values: List[float], 
-                       y_values: List[float],
-                       title: Optional[str] = None) -> Dict[str, str]:
+async def create_scatter_plot(x_values: List[float],
+                              y_values: List[float],
+                              title: Optional[str] = None) -> Dict[str, str]:
     """
     Create a scatter plot for correlation analysis.
-    
+
     Args:
         x_values: X-axis data points
         y_values: Y-axis data points
         title: Chart title (optional)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.scatter(x_values, y_values, color='red', s=50, alpha=0.6)
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Correlation Analysis', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel('X Values', fontsize=12)
-    ax.set_ylabel('Y Values', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart(
+        "scatter_plot", x_values=x_values, y_values=y_values, title=title or 'Correlation Analysis'
+    )
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "scatter_plot",
         "data_points": len(x_values)
     }
 
-def create_box_plot(data_dict: Dict[str, List[float]],
-                   title: Optional[str] = None) -> Dict[str, str]:
+async def create_box_plot(data_dict: Dict[str, List[float]],
+                          title: Optional[str] = None) -> Dict[str, str]:
     """
     Create a box plot for statistical distribution analysis.
-    
+
     Args:
         data_dict: Dictionary with category names as keys and data lists as values
         title: Chart title (optional)
-    
+
     Returns:
         Dictionary with base64 image data and metadata
     """
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.boxplot(data_dict.values(), labels=data_dict.keys())
-    
-    if title:
-        ax.set_title(title, fontsize=16, fontweight='bold')
-    else:
-        ax.set_title('Statistical Distribution', fontsize=16, fontweight='bold')
-    
-    ax.set_xlabel('Categories', fontsize=12)
-    ax.set_ylabel('Values', fontsize=12)
-    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    
-    # Convert to base64
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format='png', dpi=300, bbox_inches='tight')
-    buffer.seek(0)
-    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    buffer.close()
-    plt.close(fig)
-    
+    image = await render_chart("box_plot", data_dict=data_dict, title=title or 'Statistical Distribution')
     return {
-        "image": image_base64,
+        "image": image,
         "mime_type": "image/png",
         "chart_type": "box_plot",
         "categories": len(data_dict)
-    }
\ No newline at end of file
+    }
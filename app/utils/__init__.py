@@ -1,11 +1,22 @@
-from app.utils.model import model
-from app.utils.mcp_client import MCPClient 
-from app.utils.prompts import CHART_AGENT_SYSTEM_PROMPT, ZERODHA_AGENT_SYSTEM_PROMPT, FINANCIAL_ANALYST_SYSTEM_PROMPT
-
-__all__ = [
-    model,
-    MCPClient,
-    CHART_AGENT_SYSTEM_PROMPT,
-    ZERODHA_AGENT_SYSTEM_PROMPT,
-    FINANCIAL_ANALYST_SYSTEM_PROMPT
-]
\ No newline at end of file
+import importlib
+
+# Exported names and the submodule defining each. They are imported on first
+# access, so importing one utility does not pull in the MCP or model stacks.
+_EXPORTS = {
+    "agent_model": "app.utils.model",
+    "MCPClient": "app.utils.mcp_client",
+    "CHART_AGENT_SYSTEM_PROMPT": "app.utils.prompts",
+    "ZERODHA_AGENT_SYSTEM_PROMPT": "app.utils.prompts",
+    "FINANCIAL_ANALYST_SYSTEM_PROMPT": "app.utils.prompts",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    # Cache it, also replacing a submodule of the same name that importing it bound here
+    globals()[name] = value
+    return value
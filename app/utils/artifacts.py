@@ -0,0 +1,321 @@
+"""Local content-addressed store for large tool results.
+
+Tool outputs over a size budget are written here and replaced in the model
+context by a short summary plus an artifact id. The ``artifact_*`` tools let
+the model page, filter or aggregate the stored data by id instead. Artifacts
+unused for as long as a conversation may stay idle are deleted by the
+checkpointer's eviction sweep, as are the least recently used ones once the
+store outgrows its size limit.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from pydantic_ai import ModelRetry, Tool as PydanticTool
+
+from app.core.config import get_settings
+
+ARTIFACT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+PREVIEW_ROWS = 3
+TEXT_PREVIEW_CHARS = 500
+
+FILTER_OPS = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+    "contains": lambda a, b: a is not None and str(b).lower() in str(a).lower(),
+}
+AGGREGATE_FUNCS = ("count", "sum", "mean", "min", "max")
+
+
+class ArtifactStore:
+    """Stores payloads on disk under the hash of their content.
+
+    A file's modification time records when the artifact was last stored or
+    read, which is what eviction goes by.
+
+    Args:
+        root: Directory holding the artifacts
+        max_bytes: Total size above which the least recently used artifacts are evicted; unbounded if None
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int | None = None) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _path(self, artifact_id: str) -> Path:
+        if not ARTIFACT_ID_PATTERN.match(artifact_id):
+            raise ValueError(f"Invalid artifact id: {artifact_id!r}")
+        return self.root / f"{artifact_id}.json"
+
+    def put(self, data: bytes) -> str:
+        """Store a payload and return its artifact id. Identical payloads share one file."""
+        artifact_id = hashlib.sha256(data).hexdigest()[:32]
+        path = self._path(artifact_id)
+        if path.exists():
+            _touch(path)
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as tmp:
+                tmp.write(data)
+            os.replace(tmp.name, path)
+        return artifact_id
+
+    def get(self, artifact_id: str) -> bytes:
+        path = self._path(artifact_id)
+        if not path.exists():
+            raise KeyError(f"Unknown artifact id: {artifact_id}")
+        return path.read_bytes()
+
+    def load(self, artifact_id: str) -> Any:
+        """Return the parsed payload (JSON if possible, otherwise text)."""
+        path = self._path(artifact_id)
+        if not path.exists():
+            raise KeyError(f"Unknown artifact id: {artifact_id}")
+        _touch(path)
+        # Artifacts are immutable, so parsed payloads can be reused across paging calls.
+        return _load_parsed(self, artifact_id)
+
+    def evict(self, max_age: float) -> int:
+        """Delete artifacts unused for ``max_age`` seconds, then the least recently used ones above ``max_bytes``.
+
+        Returns:
+            int: Number of artifacts deleted
+        """
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        cutoff = time.time() - max_age
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= cutoff and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        # Evicted or unwritable; reading what is already loaded still works
+        pass
+
+
+@lru_cache(maxsize=32)
+def _load_parsed(store: ArtifactStore, artifact_id: str) -> Any:
+    return _parse(store.get(artifact_id))
+
+
+def _parse(data: bytes) -> Any:
+    text = data.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+@lru_cache()
+def get_artifact_store() -> ArtifactStore:
+    """Get the process-wide artifact store configured in Settings."""
+    settings = get_settings()
+    return ArtifactStore(settings.artifact_dir, max_bytes=settings.artifact_max_bytes)
+
+
+def records_of(payload: Any) -> List[Any] | None:
+    """Find the row list in a payload: the payload itself, or its largest list value."""
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict):
+        lists = [value for value in payload.values() if isinstance(value, list)]
+        if lists:
+            return max(lists, key=len)
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def summarize_payload(payload: Any) -> dict[str, Any]:
+    """Describe a payload compactly: row count, columns, head/tail and numeric ranges."""
+    rows = records_of(payload)
+    if rows is None:
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        return {
+            "type": "text",
+            "chars": len(text),
+            "head": text[:TEXT_PREVIEW_CHARS],
+            "tail": text[-TEXT_PREVIEW_CHARS:],
+        }
+
+    summary: dict[str, Any] = {"type": "table", "rows": len(rows)}
+    dict_rows = [row for row in rows if isinstance(row, dict)]
+    if dict_rows:
+        columns = list(dict.fromkeys(key for row in dict_rows for key in row))
+        summary["columns"] = columns
+        ranges = {}
+        for column in columns:
+            values = [row.get(column) for row in dict_rows if _is_number(row.get(column))]
+            if values:
+                ranges[column] = {"min": min(values), "max": max(values)}
+        summary["ranges"] = ranges
+    else:
+        values = [value for value in rows if _is_number(value)]
+        if values:
+            summary["ranges"] = {"value": {"min": min(values), "max": max(values)}}
+
+    summary["head"] = rows[:PREVIEW_ROWS]
+    if len(rows) > PREVIEW_ROWS:
+        summary["tail"] = rows[-PREVIEW_ROWS:]
+    return summary
+
+
+def offload(text: str, store: ArtifactStore | None = None) -> dict[str, Any]:
+    """Store a large text payload and return the summary that replaces it in context."""
+    store = store or get_artifact_store()
+    data = text.encode("utf-8")
+    artifact_id = store.put(data)
+    return {
+        "artifact_id": artifact_id,
+        "bytes": len(data),
+        "summary": summarize_payload(_parse(data)),
+        "note": (
+            "The full result was stored as an artifact. Use artifact_page, artifact_filter "
+            "or artifact_aggregate with this artifact_id to read more of it."
+        ),
+    }
+
+
+def _load(artifact_id: str) -> Any:
+    try:
+        return get_artifact_store().load(artifact_id)
+    except (KeyError, ValueError) as e:
+        raise ModelRetry(str(e))
+
+
+def _rows(artifact_id: str) -> List[Any]:
+    rows = records_of(_load(artifact_id))
+    if rows is None:
+        raise ModelRetry(f"Artifact {artifact_id} is not tabular; use artifact_page to read its text")
+    return rows
+
+
+def artifact_page(artifact_id: str, offset: int = 0, limit: int = 20) -> str:
+    """Read a page of rows from a stored tool result.
+
+    Args:
+        artifact_id: Id returned in place of a large tool result
+        offset: Index of the first row to return (default: 0)
+        limit: Number of rows to return, at most 100 (default: 20)
+    """
+    payload = _load(artifact_id)
+    offset = max(offset, 0)
+    limit = max(1, min(limit, 100))
+    rows = records_of(payload)
+    if rows is None:
+        text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+        chunk = TEXT_PREVIEW_CHARS * limit
+        return json.dumps({"offset": offset, "total_chars": len(text), "text": text[offset:offset + chunk]})
+    return json.dumps(
+        {"offset": offset, "total_rows": len(rows), "rows": rows[offset:offset + limit]},
+        default=str,
+    )
+
+
+def artifact_filter(
+    artifact_id: str,
+    column: str,
+    op: str,
+    value: Any,
+    limit: int = 50,
+) -> str:
+    """Return rows of a stored tool result whose column matches a condition.
+
+    Args:
+        artifact_id: Id returned in place of a large tool result
+        column: Column to compare
+        op: One of eq, ne, gt, gte, lt, lte, contains
+        value: Value to compare against
+        limit: Maximum number of rows to return, at most 100 (default: 50)
+    """
+    if op not in FILTER_OPS:
+        raise ModelRetry(f"Unsupported op {op!r}; use one of {', '.join(FILTER_OPS)}")
+    compare = FILTER_OPS[op]
+    matches = []
+    for row in _rows(artifact_id):
+        if not isinstance(row, dict):
+            continue
+        try:
+            if compare(row.get(column), value):
+                matches.append(row)
+        except TypeError:
+            continue
+    limit = max(1, min(limit, 100))
+    return json.dumps({"matched": len(matches), "rows": matches[:limit]}, default=str)
+
+
+def artifact_aggregate(
+    artifact_id: str,
+    column: str,
+    func: str,
+    group_by: str | None = None,
+) -> str:
+    """Aggregate a numeric column of a stored tool result, optionally per group.
+
+    Args:
+        artifact_id: Id returned in place of a large tool result
+        column: Column to aggregate
+        func: One of count, sum, mean, min, max
+        group_by: Optional column to group rows by
+    """
+    if func not in AGGREGATE_FUNCS:
+        raise ModelRetry(f"Unsupported func {func!r}; use one of {', '.join(AGGREGATE_FUNCS)}")
+
+    groups: dict[str, List[Any]] = {}
+    for row in _rows(artifact_id):
+        if not isinstance(row, dict) or column not in row:
+            continue
+        key = str(row.get(group_by)) if group_by else "all"
+        groups.setdefault(key, []).append(row[column])
+
+    def aggregate(values: List[Any]) -> Any:
+        if func == "count":
+            return len(values)
+        numbers = [value for value in values if _is_number(value)]
+        if not numbers:
+            return None
+        if func == "sum":
+            return sum(numbers)
+        if func == "mean":
+            return sum(numbers) / len(numbers)
+        return min(numbers) if func == "min" else max(numbers)
+
+    return json.dumps({key: aggregate(values) for key, values in groups.items()}, default=str)
+
+
+def artifact_tools() -> List[PydanticTool]:
+    """Companion tools for reading offloaded results, formatted for Pydantic AI."""
+    return [
+        PydanticTool(artifact_page, takes_ctx=False),
+        PydanticTool(artifact_filter, takes_ctx=False),
+        PydanticTool(artifact_aggregate, takes_ctx=False),
+    ]
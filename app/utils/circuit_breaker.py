@@ -0,0 +1,94 @@
+from typing import Any
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Per-server circuit breaker for MCP tool calls.
+
+    After ``failure_threshold`` consecutive failures or timeouts the circuit
+    opens and calls are rejected without touching the server. Once
+    ``recovery_timeout`` seconds have passed it turns half-open and lets up to
+    ``half_open_max_calls`` probe calls through: a successful probe closes the
+    circuit, a failed one opens it again. Outcomes of calls let through
+    before the circuit opened do not change it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ) -> None:
+        self.failure_threshold: int = failure_threshold
+        self.recovery_timeout: float = recovery_timeout
+        self.half_open_max_calls: int = half_open_max_calls
+        self._state: str = CLOSED
+        self._failures: int = 0
+        self._opened_at: float = 0.0
+        self._probes: int = 0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> "CircuitBreaker":
+        """Build a breaker from the ``circuit_breaker`` section of a server config."""
+        config = config or {}
+        return cls(
+            failure_threshold=config.get("failure_threshold", 5),
+            recovery_timeout=config.get("recovery_timeout", 30.0),
+            half_open_max_calls=config.get("half_open_max_calls", 1),
+        )
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until the open circuit lets a probe through."""
+        return max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the server, reserving a probe slot when half-open."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and not self._probes):
+            # A call let through before the circuit opened; only a probe may close it
+            return
+        self._state = CLOSED
+        self._failures = 0
+        self._probes = 0
+
+    def record_failure(self) -> None:
+        if self._state == OPEN:
+            # A late failure of a call let through before the trip must not restart the timeout
+            return
+        if self._state == HALF_OPEN:
+            self._trip()
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._trip()
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without a verdict (e.g. cancelled)."""
+        if self._state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._failures = 0
+        self._probes = 0
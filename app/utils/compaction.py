@@ -0,0 +1,111 @@
+"""Token-budgeted compaction of the graph's message history.
+
+Recent turns stay verbatim, older turns are folded into a running summary
+and oversized message bodies are moved to the artifact store, so the prompt
+built from the history stays roughly the same size however long a thread runs.
+"""
+
+from typing import List, Tuple
+
+from app.utils.artifacts import offload
+from app.utils.metrics import counter
+
+# Marker update for the messages channel: drop everything before it (see merge_messages).
+REMOVE_ALL_MESSAGES = {"role": "__remove_all__"}
+
+# Rough heuristic for English text with OpenAI/Anthropic tokenizers
+CHARS_PER_TOKEN = 4
+
+HISTORY_COMPACTIONS = counter(
+    "history_compactions_total", "History compactions by kind (summarized, summary_fallback, offloaded).", ["kind"]
+)
+
+
+def merge_messages(left: List[dict], right: List[dict]) -> List[dict]:
+    """Reducer for AgentState.messages: append, unless the update starts over with REMOVE_ALL_MESSAGES."""
+    for i in range(len(right) - 1, -1, -1):
+        if right[i] == REMOVE_ALL_MESSAGES:
+            return list(right[i + 1:])
+    return left + right
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_tokens(message: dict) -> int:
+    return estimate_tokens(str(message.get("content", ""))) + 4
+
+
+def format_transcript(messages: List[dict]) -> str:
+    """Render messages as a compact ``Role: content`` transcript."""
+    return "\n\n".join(
+        f"{str(message.get('role', 'unknown')).capitalize()}: {message.get('content', '')}"
+        for message in messages
+    )
+
+
+def render_history(summary: str, messages: List[dict]) -> str:
+    """Summary of older turns followed by the verbatim recent transcript."""
+    parts = []
+    if summary:
+        parts.append(f"Summary of earlier conversation:\n{summary}")
+    if messages:
+        parts.append(format_transcript(messages))
+    return "\n\n".join(parts)
+
+
+def current_turn_start(messages: List[dict]) -> int:
+    """Index of the latest user message, where the turn being answered starts (0 if there is none)."""
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].get("role") == "user":
+            return i
+    return 0
+
+
+def replace_large_payloads(messages: List[dict], max_chars: int) -> Tuple[List[dict], bool]:
+    """Move message bodies longer than ``max_chars`` to the artifact store.
+
+    Returns the new message list and whether anything was replaced.
+    """
+    replaced = False
+    result = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str) and len(content) > max_chars:
+            stored = offload(content)
+            reference = (
+                f"[Large content stored as artifact {stored['artifact_id']} ({stored['bytes']} bytes). "
+                f"Preview: {content[:max_chars // 4]}...]"
+            )
+            message = {**message, "content": reference}
+            replaced = True
+        result.append(message)
+    return result, replaced
+
+
+def split_for_budget(messages: List[dict], budget: int, keep_recent: int) -> Tuple[List[dict], List[dict]]:
+    """Split messages into (older, recent) so that ``recent`` fits in ``budget`` tokens.
+
+    The last ``keep_recent`` messages are always kept, even over budget.
+    """
+    used = 0
+    cut = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[i])
+        if used > budget and len(messages) - i > keep_recent:
+            break
+        cut = i
+    return messages[:cut], messages[cut:]
+
+
+def fallback_summary(summary: str, older: List[dict], max_tokens: int) -> str:
+    """Extractive summary used when the summarizer model is unavailable."""
+    lines = [summary] if summary else []
+    lines += [
+        f"{str(message.get('role', 'unknown')).capitalize()}: {str(message.get('content', ''))[:200]}"
+        for message in older
+    ]
+    text = "\n".join(lines)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text[-max_chars:]
@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+import logging
+import re
+
+from app.utils.metrics import counter
+
+ZERODHA_AGENT = "zerodha_agent"
+FINANCIAL_ANALYST = "financial_analyst"
+# Both markets at once: the graph fans out to every specialist in one step
+MULTI_MARKET = "multi_market"
+END_CONVERSATION = "end_conversation"
+
+ZERODHA_KEYWORDS = frozenset(
+    """
+    holding holdings portfolio position positions margin margins fund funds order orders
+    buy sell trade trades trading gtt quote quotes ltp price prices ohlc kite zerodha
+    profile instrument instruments nifty sensex share shares stock stocks mf
+    """.split()
+)
+# Only words that point at US markets on their own: "balance", "income", "revenue" and
+# "meta" also come up about the Kite account or in passing, so they are left to the LLM router
+FINANCIAL_ANALYST_KEYWORDS = frozenset(
+    """
+    usa american nasdaq nyse fundamentals fundamental earnings cashflow
+    sec filing filings crypto bitcoin btc ethereum eth apple aapl microsoft msft google googl
+    amazon amzn tesla tsla nvidia nvda
+    """.split()
+)
+# Market words that do not point at the Kite account by themselves
+GENERIC_MARKET_KEYWORDS = frozenset(
+    "quote quotes price prices stock stocks share shares ltp ohlc instrument instruments trade trading".split()
+)
+END_KEYWORDS = frozenset("summarize summarise summary recap thanks thank bye goodbye".split())
+WORD_PATTERN = re.compile(r"[a-z']+")
+
+ROUTER_DECISIONS = counter(
+    "router_decisions_total", "Routing decisions by the component that made them.", ["source"]
+)
+ROUTER_AGREEMENT = counter(
+    "router_fast_llm_agreement_total", "Fast-path router labels compared with the LLM router.", ["outcome"]
+)
+
+
+@dataclass
+class RouteDecision:
+    label: Optional[str]
+    confidence: float
+    reason: str
+
+
+class FastRouter:
+    """Keyword and rule based router that answers common intents without an LLM call.
+
+    ``classify`` returns a decision with a confidence; callers should only act
+    on it when ``is_confident`` and fall back to the LLM router otherwise. An
+    optional ``classifier`` (e.g. a small local model) is consulted when the
+    rules are unsure; it takes the latest message text and returns
+    ``(label, confidence)``.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.75,
+        classifier: Callable[[str], Tuple[Optional[str], float]] | None = None,
+    ) -> None:
+        self.threshold = threshold
+        self.classifier = classifier
+        self._agreed = 0
+        self._compared = 0
+
+    def is_confident(self, decision: RouteDecision) -> bool:
+        return decision.label is not None and decision.confidence >= self.threshold
+
+    def classify(self, messages: List[dict]) -> RouteDecision:
+        if not messages:
+            return RouteDecision(END_CONVERSATION, 1.0, "empty conversation")
+
+        last = messages[-1]
+        content = str(last.get("content") or "")
+        if last.get("role") == "assistant":
+            # An agent just answered; handing the answer to the summarizer is the common case.
+            if content.strip():
+                return RouteDecision(END_CONVERSATION, 0.8, "agent produced an answer")
+            return RouteDecision(None, 0.0, "agent produced no answer")
+
+        words = set(WORD_PATTERN.findall(content.lower()))
+        trading_hits = len(words & ZERODHA_KEYWORDS)
+        us_hits = len(words & FINANCIAL_ANALYST_KEYWORDS)
+        end_hits = len(words & END_KEYWORDS)
+        if us_hits and not end_hits:
+            if trading_hits and words & ZERODHA_KEYWORDS - GENERIC_MARKET_KEYWORDS:
+                return RouteDecision(MULTI_MARKET, 0.8, "Kite and US market keywords")
+            return RouteDecision(FINANCIAL_ANALYST, min(0.6 + 0.15 * us_hits, 0.95), "US market keywords")
+        if trading_hits and not end_hits:
+            return RouteDecision(ZERODHA_AGENT, min(0.6 + 0.15 * trading_hits, 0.95), "trading keywords")
+        if end_hits and not trading_hits:
+            return RouteDecision(END_CONVERSATION, 0.9, "closing keywords")
+
+        if self.classifier is not None:
+            label, confidence = self.classifier(content)
+            return RouteDecision(label, confidence, "local classifier")
+        return RouteDecision(None, 0.5 if trading_hits else 0.0, "ambiguous")
+
+    def record_agreement(self, fast_label: str, llm_label: str) -> None:
+        """Compare a fast-path label with the LLM router's and log the running agreement rate."""
+        agreed = fast_label == llm_label
+        self._compared += 1
+        self._agreed += agreed
+        ROUTER_AGREEMENT.inc(outcome="agree" if agreed else "disagree")
+        rate = self._agreed / self._compared
+        log = logging.info if agreed else logging.warning
+        log(f"Fast router {'agreed' if agreed else 'disagreed'} with LLM router "
+            f"({fast_label} vs {llm_label}); agreement {rate:.1%} over {self._compared} samples")
@@ -0,0 +1,230 @@
+"""Hedged model requests.
+
+If a model call has not produced its first token after the threshold (a
+percentile of recent first-token latencies), a duplicate request is sent to
+the same or a secondary model. Whichever responds first is used and the other
+is cancelled. The share of requests that may be hedged is capped, so a slow
+provider does not get twice the load.
+
+For streamed requests the first token is when ``request_stream`` yields:
+pydantic-ai models peek at the first chunk before handing the stream over.
+"""
+
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import time
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import KnownModelName, Model, ModelRequestParameters, StreamedResponse, infer_model
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from app.core.config import get_settings
+from app.utils.metrics import counter
+
+LLM_HEDGES = counter(
+    "llm_hedged_requests_total", "Model requests that were hedged, by agent and which request won.", ["agent", "winner"]
+)
+LLM_HEDGES_SKIPPED = counter(
+    "llm_hedges_skipped_total", "Slow model requests not hedged because the hedge budget was used up.", ["agent"]
+)
+
+
+class HedgePolicy:
+    """Decides when to hedge: the latency threshold and the hedge budget.
+
+    Args:
+        percentile: First-token latency percentile after which a request is hedged
+        max_rate: Maximum share of recent requests that may be hedged
+        initial_delay: Threshold in seconds until ``min_samples`` latencies have been seen
+        min_delay: Lower bound on the threshold, so fast providers are not hedged on noise
+        window: Number of recent requests the percentile and hedge rate are computed over
+        min_samples: Latencies needed before the percentile is trusted
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_rate: float = 0.1,
+        initial_delay: float = 5.0,
+        min_delay: float = 0.2,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.hedged: deque[bool] = deque(maxlen=window)
+
+    def threshold(self) -> float:
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self.latencies)
+        index = min(int(len(ordered) * self.percentile / 100), len(ordered) - 1)
+        return max(ordered[index], self.min_delay)
+
+    def allow_hedge(self) -> bool:
+        return sum(self.hedged) < self.max_rate * max(len(self.hedged), self.min_samples)
+
+    def record(self, latency: float | None, hedged: bool) -> None:
+        """Record a finished request: its first-token latency, if known, and whether it was hedged."""
+        if latency is not None:
+            self.latencies.append(latency)
+        self.hedged.append(hedged)
+
+
+@lru_cache(maxsize=None)
+def get_hedge_policy(agent: str) -> HedgePolicy:
+    """The agent's hedge policy configured in Settings, shared by all its runs so it learns their latencies."""
+    settings = get_settings()
+    return HedgePolicy(
+        percentile=settings.llm_hedge_percentile,
+        max_rate=settings.llm_hedge_max_rate,
+        initial_delay=settings.llm_hedge_initial_delay,
+    )
+
+
+async def _cancel(task: asyncio.Task) -> None:
+    """Cancel a task and wait for it, discarding its outcome."""
+    task.cancel()
+    await asyncio.wait({task})
+    if not task.cancelled():
+        task.exception()
+
+
+class _StreamAttempt:
+    """A streamed request held open by its own task, so it can be closed without touching the caller."""
+
+    def __init__(self, model: Model, *args) -> None:
+        self.model = model
+        self.args = args
+        self.released = asyncio.Event()
+        self.holder: asyncio.Task | None = None
+        self.stream: StreamedResponse | None = None
+
+    async def open(self) -> StreamedResponse:
+        ready = asyncio.get_running_loop().create_future()
+        self.holder = asyncio.create_task(self._hold(ready))
+        try:
+            return await ready
+        except BaseException:
+            await _cancel(self.holder)
+            raise
+
+    async def _hold(self, ready: asyncio.Future) -> None:
+        try:
+            async with self.model.request_stream(*self.args) as self.stream:
+                ready.set_result(self.stream)
+                await self.released.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+            raise
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+
+    async def close(self) -> None:
+        if self.holder is not None:
+            self.released.set()
+            await asyncio.wait({self.holder})
+
+
+class HedgedModel(WrapperModel):
+    """Model wrapper sending a duplicate request when the first is slow to respond.
+
+    Args:
+        wrapped: Model used for the first request
+        agent: Agent name, used for metrics
+        hedge: Model used for the duplicate request; the wrapped model by default
+        policy: Threshold and budget; a default ``HedgePolicy`` if not given
+    """
+
+    def __init__(
+        self,
+        wrapped: Model | KnownModelName,
+        agent: str,
+        hedge: Model | KnownModelName | None = None,
+        policy: HedgePolicy | None = None,
+    ) -> None:
+        super().__init__(wrapped)
+        self.agent = agent
+        self.hedge = self.wrapped if hedge is None else infer_model(hedge)
+        self.policy = policy or HedgePolicy()
+
+    async def _race(self, primary_call, hedge_call) -> asyncio.Task:
+        """Start the primary call, hedge it if it is slow, and return the finished task that won.
+
+        The loser is cancelled. If the first call to finish failed while the
+        other is still running, the other one wins.
+        """
+        started = time.perf_counter()
+        primary = asyncio.create_task(primary_call())
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.policy.threshold())
+            if not done and not self.policy.allow_hedge():
+                LLM_HEDGES_SKIPPED.inc(agent=self.agent)
+                await asyncio.wait({primary})
+        except BaseException:
+            await _cancel(primary)
+            raise
+        if primary.done():
+            self.policy.record(time.perf_counter() - started, hedged=False)
+            return primary
+
+        hedge = asyncio.create_task(hedge_call())
+        try:
+            done, pending = await asyncio.wait({primary, hedge}, return_when=asyncio.FIRST_COMPLETED)
+            winner = primary if primary in done else hedge
+            if winner.exception() is not None and pending:
+                # The first to finish failed; give the other one its chance
+                winner = pending.pop()
+                await asyncio.wait({winner})
+        except BaseException:
+            await _cancel(primary)
+            await _cancel(hedge)
+            raise
+        # Recorded even if the hedge won: the primary was at least this slow
+        self.policy.record(time.perf_counter() - started, hedged=True)
+        LLM_HEDGES.inc(agent=self.agent, winner="primary" if winner is primary else "hedge")
+        await _cancel(hedge if winner is primary else primary)
+        return winner
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        winner = await self._race(
+            lambda: self.wrapped.request(messages, model_settings, model_request_parameters),
+            lambda: self.hedge.request(messages, model_settings, model_request_parameters),
+        )
+        return winner.result()
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        args = (messages, model_settings, model_request_parameters)
+        attempts = [_StreamAttempt(self.wrapped, *args), _StreamAttempt(self.hedge, *args)]
+        try:
+            winner = await self._race(attempts[0].open, attempts[1].open)
+            stream = winner.result()
+            # A losing attempt may have opened its stream just before it was cancelled
+            for attempt in attempts:
+                if attempt.stream is not stream:
+                    await attempt.close()
+            yield stream
+        finally:
+            for attempt in attempts:
+                await attempt.close()
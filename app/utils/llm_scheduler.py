@@ -0,0 +1,195 @@
+"""Process-wide scheduler for LLM calls.
+
+Every model call made through a ``ScheduledModel`` takes one of a fixed
+number of in-flight slots. When all slots are busy, callers queue by
+priority class; within a class, users are served round-robin so one user's
+burst cannot starve everyone else.
+"""
+
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import AsyncIterator
+import asyncio
+import time
+
+from langgraph.config import get_config
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import KnownModelName, Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from app.core.config import get_settings
+from app.utils.metrics import gauge, histogram
+
+# Priority classes, served in this order
+ROUTING = "routing"
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (ROUTING, INTERACTIVE, BULK)
+
+ANONYMOUS = "anonymous"
+
+# Set by callers that know who the request is for; otherwise the LangGraph thread is used
+current_user: ContextVar[str | None] = ContextVar("llm_current_user", default=None)
+
+LLM_QUEUE_DEPTH = gauge("llm_queue_depth", "LLM calls waiting for a slot.", ["priority"])
+LLM_IN_FLIGHT = gauge("llm_in_flight", "LLM calls currently running.")
+LLM_QUEUE_WAIT = histogram("llm_queue_wait_seconds", "Time LLM calls waited for a slot.", ["priority"])
+
+
+def resolve_user() -> str:
+    """The user a model call is made for: ``current_user``, else the graph run's user_id or thread_id."""
+    if user := current_user.get():
+        return user
+    try:
+        configurable = get_config().get("configurable", {})
+    except RuntimeError:
+        return ANONYMOUS
+    return str(configurable.get("user_id") or configurable.get("thread_id") or ANONYMOUS)
+
+
+class LLMScheduler:
+    """Caps concurrent LLM calls and hands free slots out by priority, then fairly across users.
+
+    Args:
+        max_in_flight: Maximum number of model calls running at once
+    """
+
+    def __init__(self, max_in_flight: int = 8) -> None:
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        # priority -> user -> waiting futures; user order is the round-robin order
+        self._waiters: dict[str, OrderedDict[str, deque[asyncio.Future]]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+
+    @classmethod
+    def from_config(cls) -> "LLMScheduler":
+        return cls(max_in_flight=get_settings().llm_max_in_flight)
+
+    def queue_depth(self, priority: str | None = None) -> int:
+        priorities = [priority] if priority else PRIORITIES
+        return sum(len(queue) for p in priorities for queue in self._waiters[p].values())
+
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE, user: str = ANONYMOUS) -> AsyncIterator[None]:
+        """Hold an in-flight slot for the duration of the block, waiting for one if needed."""
+        if priority not in self._waiters:
+            raise ValueError(f"Unknown priority {priority!r}; use one of {', '.join(PRIORITIES)}")
+
+        start = time.monotonic()
+        if self.in_flight < self.max_in_flight and not self.queue_depth():
+            self._take()
+        else:
+            await self._wait(priority, user)
+        LLM_QUEUE_WAIT.observe(time.monotonic() - start, priority=priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, priority: str, user: str) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].setdefault(user, deque()).append(future)
+        LLM_QUEUE_DEPTH.set(self.queue_depth(priority), priority=priority)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self._release()
+            else:
+                self._discard(priority, user, future)
+            raise
+
+    def _take(self) -> None:
+        self.in_flight += 1
+        LLM_IN_FLIGHT.set(self.in_flight)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        LLM_IN_FLIGHT.set(self.in_flight)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_in_flight:
+            future = self._next_waiter()
+            if future is None:
+                return
+            self._take()
+            future.set_result(None)
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        for priority in PRIORITIES:
+            users = self._waiters[priority]
+            while users:
+                user, queue = next(iter(users.items()))
+                future = queue.popleft()
+                if queue:
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                LLM_QUEUE_DEPTH.set(self.queue_depth(priority), priority=priority)
+                if not future.done():
+                    return future
+        return None
+
+    def _discard(self, priority: str, user: str, future: asyncio.Future) -> None:
+        queue = self._waiters[priority].get(user)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self._waiters[priority][user]
+        LLM_QUEUE_DEPTH.set(self.queue_depth(priority), priority=priority)
+
+
+@lru_cache()
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide LLM scheduler configured in Settings."""
+    return LLMScheduler.from_config()
+
+
+class ScheduledModel(WrapperModel):
+    """Model wrapper that runs every request through the shared LLM scheduler.
+
+    Args:
+        wrapped: Model (or model name) to call
+        priority: Priority class of the agent using this model
+        scheduler: Scheduler to use, the process-wide one by default
+    """
+
+    def __init__(
+        self,
+        wrapped: Model | KnownModelName,
+        priority: str = INTERACTIVE,
+        scheduler: LLMScheduler | None = None,
+    ) -> None:
+        super().__init__(wrapped)
+        self.priority = priority
+        self._scheduler = scheduler
+
+    @property
+    def scheduler(self) -> LLMScheduler:
+        return self._scheduler or get_scheduler()
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        async with self.scheduler.slot(self.priority, resolve_user()):
+            return await self.wrapped.request(messages, model_settings, model_request_parameters)
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        async with self.scheduler.slot(self.priority, resolve_user()):
+            async with self.wrapped.request_stream(messages, model_settings, model_request_parameters) as stream:
+                yield stream
@@ -2,19 +2,97 @@ from pydantic_ai import RunContext, Tool as PydanticTool
 from pydantic_ai.tools import ToolDefinition
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from mcp.types import Tool as MCPTool
-from contextlib import AsyncExitStack
-from typing import Any, List
+from mcp.server import Server
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import (
+    CallToolResult,
+    EmbeddedResource,
+    ImageContent,
+    TextContent,
+    Tool as MCPTool,
+)
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, List
 import asyncio
+import copy
+import importlib
 import logging
 import shutil
 import json
+import time
 import os
 
+import logfire
+
+from app.utils.artifacts import artifact_tools, offload
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.utils.metrics import (
+    MCP_CIRCUIT_STATE,
+    MCP_TOOL_CACHE_HITS,
+    MCP_TOOL_ERRORS,
+    MCP_TOOL_IN_FLIGHT,
+    MCP_TOOL_INVALID_ARGUMENTS,
+    MCP_TOOL_LATENCY,
+    MCP_TOOL_OFFLOADED,
+    MCP_TOOL_REJECTED,
+    MCP_TOOL_RESPONSE_BYTES,
+    MCP_TOOL_TIMEOUTS,
+)
+from app.utils.llm_scheduler import resolve_user
+from app.utils.tool_cache import is_mutating_tool, shared_cache
+from app.utils.tool_validation import compile_validator
+
 logging.basicConfig(
     level=logging.ERROR, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Default cap on concurrent in-flight tool calls per server; override with "max_concurrency".
+DEFAULT_MAX_CONCURRENCY = 8
+# Default per-call deadline in seconds; override with "timeout" and per tool with "tool_timeouts".
+DEFAULT_TOOL_TIMEOUT = 20.0
+
+# Text results larger than this are offloaded to the artifact store; override with
+# "max_result_bytes" (0 disables offloading for a server).
+DEFAULT_MAX_RESULT_BYTES = 16 * 1024
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def load_inprocess_server(config: dict[str, Any]) -> Server:
+    """Import the MCP server object for an in-process transport.
+
+    Args:
+        config: Server config with ``module`` (dotted import path) and ``server``
+            (attribute name, defaults to ``mcp``). Both FastMCP and low-level
+            Server instances are accepted.
+    """
+    module = importlib.import_module(config["module"])
+    server = getattr(module, config.get("server", "mcp"))
+    if isinstance(server, FastMCP):
+        return server._mcp_server
+    if isinstance(server, Server):
+        return server
+    raise ValueError(f"{config['module']}.{config.get('server', 'mcp')} is not an MCP server")
+
+
+def tool_error(message: str) -> CallToolResult:
+    """Build an error result the model can read, in the same shape a server would return."""
+    return CallToolResult(isError=True, content=[TextContent(type="text", text=message)])
+
+
+def result_size(result: CallToolResult) -> int:
+    """Approximate payload size of a tool result in bytes."""
+    size = 0
+    for item in result.content:
+        if isinstance(item, TextContent):
+            size += len(item.text.encode("utf-8"))
+        elif isinstance(item, ImageContent):
+            size += len(item.data)
+        elif isinstance(item, EmbeddedResource):
+            size += len(getattr(item.resource, "text", None) or getattr(item.resource, "blob", ""))
+    return size
+
+
 class MCPClient:
     """Manages connections to one or more MCP servers based on mcp_config.json"""
 
@@ -49,6 +127,8 @@ class MCPClient:
                 await self.cleanup_servers()
                 return []
 
+        if any(server.max_result_bytes for server in self.servers):
+            self.tools += artifact_tools()
         return self.tools
 
     async def cleanup_servers(self) -> None:
@@ -70,6 +150,100 @@ class MCPClient:
             logging.warning(f"Warning during final cleanup: {e}")
 
 
+class WarmMCPClient:
+    """An MCPClient kept connected by its own task, so its sessions outlive the agent runs using them.
+
+    stdio transports must be entered and exited in the same task, which is
+    why the client is not simply started by whichever run needs it first.
+
+    Args:
+        config_path: Path to the mcp_config.json of the servers to connect to
+    """
+
+    def __init__(self, config_path: str) -> None:
+        self.config_path = config_path
+        self.tools: List[PydanticTool] = []
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> List[PydanticTool]:
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._hold(ready))
+        self.tools = await ready
+        return self.tools
+
+    async def _hold(self, ready: asyncio.Future) -> None:
+        client = MCPClient()
+        try:
+            client.load_servers(self.config_path)
+            ready.set_result(await client.start())
+            await self._stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            await client.cleanup()
+
+    async def close(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+
+
+class MCPPool:
+    """Warm MCP connections shared by all agent runs, one client per config file."""
+
+    def __init__(self) -> None:
+        self._clients: dict[str, WarmMCPClient] = {}
+        self._lock = asyncio.Lock()
+
+    async def tools(self, config_path: str) -> List[PydanticTool]:
+        """The tools of the servers in ``config_path``, connecting on first use."""
+        async with self._lock:
+            if config_path not in self._clients:
+                client = WarmMCPClient(config_path)
+                # A failed start is not kept, so the next run tries to connect again
+                if not await client.start():
+                    await client.close()
+                    return []
+                self._clients[config_path] = client
+        # Tools keep their retry count on themselves; give each run its own copies
+        return [copy.copy(tool) for tool in self._clients[config_path].tools]
+
+    async def close(self) -> None:
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.close()
+
+
+_active_pool: MCPPool | None = None
+
+
+@asynccontextmanager
+async def mcp_pool() -> AsyncIterator[MCPPool]:
+    """Share warm MCP connections between all agent runs inside the block."""
+    global _active_pool
+    previous, _active_pool = _active_pool, MCPPool()
+    try:
+        yield _active_pool
+    finally:
+        pool, _active_pool = _active_pool, previous
+        await pool.close()
+
+
+async def connect_tools(config_path: str) -> tuple[MCPClient | None, List[PydanticTool]]:
+    """Connect to the servers in ``config_path`` and return the client and its tools.
+
+    Inside ``mcp_pool()`` the pooled connection is reused and the client is
+    None, since the pool owns it; otherwise the caller must clean the client up.
+    """
+    if _active_pool is not None:
+        return None, await _active_pool.tools(config_path)
+    client = MCPClient()
+    client.load_servers(config_path)
+    return client, await client.start()
+
+
 class MCPServer:
     """Manages MCP server connections and tool execution."""
 
@@ -80,9 +254,38 @@ class MCPServer:
         self.session: ClientSession | None = None
         self._cleanup_lock: asyncio.Lock = asyncio.Lock()
         self.exit_stack: AsyncExitStack = AsyncExitStack()
+        # ClientSession multiplexes requests by JSON-RPC id, so concurrent calls can share
+        # one stdio/SSE session; the semaphore only bounds how many are in flight at once.
+        self.max_concurrency: int = config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+        self._in_flight: asyncio.Semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.timeout: float = config.get("timeout", DEFAULT_TOOL_TIMEOUT)
+        self.tool_timeouts: dict[str, float] = config.get("tool_timeouts", {})
+        self.breaker: CircuitBreaker = CircuitBreaker.from_config(config.get("circuit_breaker"))
+        self.max_result_bytes: int = config.get("max_result_bytes", DEFAULT_MAX_RESULT_BYTES)
 
     async def initialize(self) -> None:
-        """Initialize the server connection."""
+        """Initialize the server connection.
+
+        ``"transport": "inprocess"`` imports the server object named by ``module``
+        and ``server`` and talks to it over in-memory streams on the current event
+        loop. Anything else launches ``command`` as a stdio subprocess.
+        """
+        try:
+            with logfire.span("mcp connect {server}", server=self.name, transport=self.config.get("transport", "stdio")):
+                if self.config.get("transport") == "inprocess":
+                    session = await self.exit_stack.enter_async_context(
+                        create_connected_server_and_client_session(load_inprocess_server(self.config))
+                    )
+                else:
+                    session = await self._connect_stdio()
+            self.session = session
+        except Exception as e:
+            logging.error(f"Error initializing server {self.name}: {e}")
+            await self.cleanup()
+            raise
+
+    async def _connect_stdio(self) -> ClientSession:
+        """Spawn the server process and open a session over its stdio."""
         command = (
             shutil.which("npx")
             if self.config["command"] == "npx"
@@ -98,20 +301,15 @@ class MCPServer:
             if self.config.get("env")
             else None,
         )
-        try:
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            read, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-            self.session = session
-        except Exception as e:
-            logging.error(f"Error initializing server {self.name}: {e}")
-            await self.cleanup()
-            raise
+        stdio_transport = await self.exit_stack.enter_async_context(
+            stdio_client(server_params)
+        )
+        read, write = stdio_transport
+        session = await self.exit_stack.enter_async_context(
+            ClientSession(read, write)
+        )
+        await session.initialize()
+        return session
 
     async def create_pydantic_ai_tools(self) -> List[PydanticTool]:
         """Convert MCP tools to pydantic_ai Tools."""
@@ -120,8 +318,13 @@ class MCPServer:
 
     def create_tool_instance(self, tool: MCPTool) -> PydanticTool:
         """Initialize a Pydantic AI Tool from an MCP Tool."""
+        validator = compile_validator(tool.name, tool.inputSchema)
+
         async def execute_tool(**kwargs: Any) -> Any:
-            return await self.session.call_tool(tool.name, arguments=kwargs)
+            if validator is not None and (errors := validator.errors(kwargs)):
+                MCP_TOOL_INVALID_ARGUMENTS.inc(server=self.name, tool=tool.name)
+                return tool_error(json.dumps({"error": "invalid_arguments", "tool": tool.name, "details": errors}))
+            return await self.call_tool(tool.name, kwargs)
 
         async def prepare_tool(ctx: RunContext, tool_def: ToolDefinition) -> ToolDefinition | None:
             tool_def.parameters_json_schema = tool.inputSchema
@@ -135,6 +338,96 @@ class MCPServer:
             prepare=prepare_tool
         )
 
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any]) -> Any:
+        """Call a tool on the server, serving idempotent reads from the result cache.
+
+        Each call gets a deadline (``timeout`` / ``tool_timeouts`` in the server
+        config). Timeouts and transport failures feed the circuit breaker and
+        come back as error results; while it is open, calls fail fast with an
+        error result instead of reaching the server.
+        """
+        with logfire.span("mcp tool {tool}", server=self.name, tool=tool_name) as span:
+            result = await self._call_tool(tool_name, arguments)
+            span.set_attribute("response_bytes", result_size(result))
+            span.set_attribute("is_error", bool(result.isError))
+            return result
+
+    async def _call_tool(self, tool_name: str, arguments: dict[str, Any]) -> CallToolResult:
+        # Results are cached per user (or thread): the server config holds no account credentials
+        cache = shared_cache(self.name, self.config, resolve_user())
+        generation = cache.generation if cache is not None else None
+        if cache is not None:
+            cached = cache.get(tool_name, arguments)
+            if cached is not None:
+                MCP_TOOL_CACHE_HITS.inc(server=self.name, tool=tool_name)
+                return cached
+
+        if not self.breaker.allow_request():
+            MCP_TOOL_REJECTED.inc(server=self.name, tool=tool_name)
+            return tool_error(
+                f"{tool_name} is unavailable: the {self.name} server is failing, "
+                f"retry in {self.breaker.retry_after():.0f}s."
+            )
+
+        timeout = self.tool_timeouts.get(tool_name, self.timeout)
+        try:
+            async with self._in_flight:
+                MCP_TOOL_IN_FLIGHT.inc(server=self.name)
+                start = time.perf_counter()
+                # No notifications/cancelled is sent for an abandoned call: the mcp client
+                # closes the session when it sends one, failing every later call.
+                try:
+                    async with asyncio.timeout(timeout):
+                        result = await self.session.call_tool(tool_name, arguments=arguments)
+                except TimeoutError:
+                    self.breaker.record_failure()
+                    MCP_TOOL_TIMEOUTS.inc(server=self.name, tool=tool_name)
+                    MCP_TOOL_ERRORS.inc(server=self.name, tool=tool_name)
+                    return tool_error(f"{tool_name} timed out after {timeout:g}s.")
+                except Exception as e:
+                    # A broken session or transport fails this call, not the whole agent run
+                    self.breaker.record_failure()
+                    MCP_TOOL_ERRORS.inc(server=self.name, tool=tool_name)
+                    logging.warning(f"Tool {tool_name} on server {self.name} failed: {e!r}")
+                    return tool_error(f"{tool_name} failed: the {self.name} server did not answer ({e or type(e).__name__}).")
+                finally:
+                    MCP_TOOL_LATENCY.observe(time.perf_counter() - start, server=self.name, tool=tool_name)
+                    MCP_TOOL_IN_FLIGHT.dec(server=self.name)
+                    MCP_CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[self.breaker.state], server=self.name)
+                    # Invalidate even on failure: the order may have gone through before the error.
+                    if cache is not None and is_mutating_tool(tool_name):
+                        cache.invalidate_for(tool_name)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+        # An error result means the server answered, so it still counts as healthy.
+        self.breaker.record_success()
+        MCP_CIRCUIT_STATE.set(CIRCUIT_STATE_VALUES[self.breaker.state], server=self.name)
+        if result.isError:
+            MCP_TOOL_ERRORS.inc(server=self.name, tool=tool_name)
+        size = result_size(result)
+        MCP_TOOL_RESPONSE_BYTES.observe(size, server=self.name, tool=tool_name)
+        if self.max_result_bytes and size > self.max_result_bytes and not result.isError:
+            result = self._offload(result)
+
+        if cache is not None:
+            cache.put(tool_name, arguments, result, generation)
+        return result
+
+    def _offload(self, result: CallToolResult) -> CallToolResult:
+        """Move the text of a large result to the artifact store, keeping a summary in its place."""
+        text = "".join(item.text for item in result.content if isinstance(item, TextContent))
+        if not text:
+            return result
+        try:
+            summary = offload(text)
+        except OSError as e:
+            logging.warning(f"Could not offload large result from server {self.name}: {e}")
+            return result
+        MCP_TOOL_OFFLOADED.inc(server=self.name)
+        return CallToolResult(content=[TextContent(type="text", text=json.dumps(summary, default=str))])
+
     async def cleanup(self) -> None:
         """Clean up server resources."""
         async with self._cleanup_lock:
@@ -1,24 +1,148 @@
-from pydantic_ai.models.bedrock import BedrockConverseModel
-from pydantic_ai.providers.bedrock import BedrockProvider
+"""Model selection per agent.
+
+Each agent gets the models listed for it in ``Settings.agent_models``: the
+first is used normally, the rest are tried in order when it fails. Every
+model is metered per agent and runs through the shared LLM scheduler, and
+agents can opt in to hedging slow requests (see app.utils.hedging).
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
-import boto3
 import os
+import time
+
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import KnownModelName, Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.fallback import FallbackModel
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.usage import Usage
+
+from app.core.config import get_settings
+from app.utils.hedging import HedgedModel, get_hedge_policy
+from app.utils.llm_scheduler import INTERACTIVE, ScheduledModel
+from app.utils.metrics import counter, histogram
 
 load_dotenv()
 
-required_vars = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN']
-missing_vars = [var for var in required_vars if not os.getenv(var)]
+LLM_REQUEST_LATENCY = histogram(
+    "llm_request_seconds", "Model request latency by agent and model, excluding scheduler queueing.", ["agent", "model"]
+)
+LLM_TOKENS = counter("llm_tokens_total", "Model tokens by agent, model and kind (request/response).", ["agent", "model", "kind"])
+LLM_REQUEST_ERRORS = counter("llm_request_errors_total", "Failed model requests by agent and model.", ["agent", "model"])
+
+# Models usable by name in Settings.agent_models besides pydantic-ai's "provider:model"
+# names, e.g. a Bedrock model with a custom client or a scripted model for benchmarks
+registered_models: dict[str, Model] = {}
+
+
+@lru_cache()
+def bedrock_client():
+    """The Bedrock runtime client, created on first use; needs AWS credentials in the environment."""
+    required_vars = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN']
+    missing_vars = [var for var in required_vars if not os.getenv(var)]
+
+    if missing_vars:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+
+    import boto3
+
+    return boto3.client('bedrock-runtime', region_name='us-west-2')
+
+
+def bedrock_model(model_id: str):
+    """A Bedrock Converse model using ``bedrock_client()``, e.g. to register in ``registered_models``.
+
+    Example model ids:
+        "us.anthropic.claude-sonnet-4-20250514-v1:0"
+        "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+        "arn:aws:bedrock:us-west-2:100098606670:inference-profile/us.anthropic.claude-sonnet-4-20250514-v1:0"
+    """
+    from pydantic_ai.models.bedrock import BedrockConverseModel
+    from pydantic_ai.providers.bedrock import BedrockProvider
+
+    return BedrockConverseModel(model_id, provider=BedrockProvider(bedrock_client=bedrock_client()))
+
+
+class MeteredModel(WrapperModel):
+    """Model wrapper recording latency, tokens and errors of each request under the agent's name.
+
+    Args:
+        wrapped: Model (or model name) to call
+        agent: Agent name, used for metrics
+    """
+
+    def __init__(self, wrapped: Model | KnownModelName, agent: str) -> None:
+        super().__init__(wrapped)
+        self.agent = agent
+
+    def _record(self, start: float, usage: Usage) -> None:
+        labels = {"agent": self.agent, "model": self.model_name}
+        LLM_REQUEST_LATENCY.observe(time.perf_counter() - start, **labels)
+        LLM_TOKENS.inc(usage.request_tokens or 0, kind="request", **labels)
+        LLM_TOKENS.inc(usage.response_tokens or 0, kind="response", **labels)
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        start = time.perf_counter()
+        try:
+            response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        except Exception:
+            LLM_REQUEST_ERRORS.inc(agent=self.agent, model=self.model_name)
+            raise
+        self._record(start, response.usage)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        start = time.perf_counter()
+        try:
+            async with self.wrapped.request_stream(messages, model_settings, model_request_parameters) as stream:
+                yield stream
+        except Exception:
+            LLM_REQUEST_ERRORS.inc(agent=self.agent, model=self.model_name)
+            raise
+        self._record(start, stream.usage())
+
+
+def agent_model_names(agent: str) -> list[str]:
+    """The models configured for an agent, preferred first."""
+    settings = get_settings()
+    return settings.agent_models.get(agent) or [settings.default_model]
+
+
+def agent_model(agent: str, priority: str = INTERACTIVE) -> Model:
+    """The model for an agent: its configured models in fallback order, metered and scheduled at ``priority``.
 
-if missing_vars:
-    raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
+    If the agent is in ``Settings.llm_hedge_agents``, slow requests to its first model are hedged.
 
-bedrock_client = boto3.client('bedrock-runtime', region_name='us-west-2')
-# model = BedrockConverseModel(
-#     # "us.anthropic.claude-sonnet-4-20250514-v1:0",
-#     # "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-#     "arn:aws:bedrock:us-west-2:100098606670:inference-profile/us.anthropic.claude-sonnet-4-20250514-v1:0",
-#     # "arn:aws:bedrock:us-west-2:100098606670:inference-profile/us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-#     provider=BedrockProvider(bedrock_client=bedrock_client),
-# )
+    Args:
+        agent: Agent name, the key into ``Settings.agent_models``
+        priority: Scheduler priority class of the agent's calls
+    """
+    def metered(name: str) -> Model:
+        return MeteredModel(registered_models.get(name, name), agent)
 
-model="openai:gpt-4o-mini"
\ No newline at end of file
+    names = agent_model_names(agent)
+    models = [metered(name) for name in names]
+    settings = get_settings()
+    if agent in settings.llm_hedge_agents:
+        # Hedged inside the primary's scheduler slot, so time queued for it is not counted
+        # as first-token latency; the hedge waits for a slot of its own like any other call
+        hedge = ScheduledModel(metered(settings.llm_hedge_models.get(agent, names[0])), priority)
+        models[0] = HedgedModel(models[0], agent, hedge=hedge, policy=get_hedge_policy(agent))
+    models = [ScheduledModel(model, priority) for model in models]
+    if len(models) == 1:
+        return models[0]
+    return FallbackModel(*models)
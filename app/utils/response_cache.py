@@ -0,0 +1,222 @@
+"""On-disk cache of model responses for agents whose prompts repeat.
+
+Entries are keyed on the model, the system prompt, the whitespace-normalized
+conversation and the tools offered, and are kept in a SQLite file bounded
+by entry count (least recently used first out) and age.
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelMessagesTypeAdapter,
+    ModelResponse,
+    ModelResponseStreamEvent,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+)
+from pydantic_ai.models import Model, ModelRequestParameters, StreamedResponse
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+
+from app.core.config import get_settings
+from app.utils.metrics import counter
+
+WHITESPACE = re.compile(r"\s+")
+
+LLM_CACHE_REQUESTS = counter(
+    "llm_response_cache_total", "LLM response cache lookups by agent and result.", ["agent", "result"]
+)
+
+
+def normalize(text: str) -> str:
+    """Collapse whitespace so prompts differing only in indentation or line breaks share a key."""
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def cache_key(
+    model_name: str,
+    messages: list[ModelMessage],
+    model_settings: ModelSettings | None,
+    parameters: ModelRequestParameters,
+) -> str:
+    """Hash of everything that determines a model response."""
+    system, conversation = [], []
+    for message in messages:
+        for part in message.parts:
+            if isinstance(part, SystemPromptPart):
+                system.append(normalize(part.content))
+            else:
+                content = part.args if isinstance(part, ToolCallPart) else getattr(part, "content", "")
+                conversation.append([part.part_kind, normalize(str(content))])
+    payload = {
+        "model": model_name,
+        "system": system,
+        "messages": conversation,
+        "settings": model_settings or {},
+        "tools": sorted(tool.name for tool in parameters.function_tools),
+        "output_tools": sorted(tool.name for tool in parameters.output_tools),
+        "allow_text_output": parameters.allow_text_output,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Bounded LRU cache of model responses in a SQLite file.
+
+    Args:
+        path: Database file, or ":memory:"
+        ttl: Seconds an entry stays valid
+        max_entries: Entries kept; the least recently used are dropped first
+    """
+
+    def __init__(self, path: str, ttl: float = 3600.0, max_entries: int = 2000) -> None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> ModelResponse | None:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return ModelMessagesTypeAdapter.validate_json(row[0])[0]
+
+    def put(self, key: str, response: ModelResponse) -> None:
+        now = time.time()
+        data = ModelMessagesTypeAdapter.dump_json([response])
+        with self._lock:
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, data, now, now))
+                self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                self.conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+
+
+@lru_cache()
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache configured in Settings."""
+    settings = get_settings()
+    return ResponseCache(settings.llm_cache_path, ttl=settings.llm_cache_ttl, max_entries=settings.llm_cache_max_entries)
+
+
+@dataclass
+class CachedStreamedResponse(StreamedResponse):
+    """Replays a cached response as a stream, one event per part."""
+
+    _response: ModelResponse = field(default=None)
+
+    async def _get_event_iterator(self) -> AsyncIterator[ModelResponseStreamEvent]:
+        for index, part in enumerate(self._response.parts):
+            if isinstance(part, TextPart):
+                yield self._parts_manager.handle_text_delta(vendor_part_id=index, content=part.content)
+            elif isinstance(part, ToolCallPart):
+                yield self._parts_manager.handle_tool_call_part(
+                    vendor_part_id=index, tool_name=part.tool_name, args=part.args, tool_call_id=part.tool_call_id
+                )
+
+    @property
+    def model_name(self) -> str:
+        return self._response.model_name or ""
+
+    @property
+    def timestamp(self) -> datetime:
+        return self._response.timestamp
+
+
+class CachedModel(WrapperModel):
+    """Model wrapper answering repeated requests from the response cache.
+
+    Args:
+        wrapped: Model to call on a cache miss
+        agent: Agent name, used for metrics
+        cache: Cache to use, the process-wide one by default
+    """
+
+    def __init__(self, wrapped: Model, agent: str, cache: ResponseCache | None = None) -> None:
+        super().__init__(wrapped)
+        self.agent = agent
+        self._cache = cache
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache or get_response_cache()
+
+    async def _lookup(self, key: str) -> ModelResponse | None:
+        response = await asyncio.to_thread(self.cache.get, key)
+        LLM_CACHE_REQUESTS.inc(agent=self.agent, result="hit" if response is not None else "miss")
+        return response
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        key = cache_key(self.model_name, messages, model_settings, model_request_parameters)
+        if (response := await self._lookup(key)) is not None:
+            return response
+        response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        await asyncio.to_thread(self.cache.put, key, response)
+        return response
+
+    @asynccontextmanager
+    async def request_stream(
+        self,
+        messages: list[ModelMessage],
+        model_settings: ModelSettings | None,
+        model_request_parameters: ModelRequestParameters,
+    ) -> AsyncIterator[StreamedResponse]:
+        key = cache_key(self.model_name, messages, model_settings, model_request_parameters)
+        if (response := await self._lookup(key)) is not None:
+            yield CachedStreamedResponse(_response=response)
+            return
+        async with self.wrapped.request_stream(messages, model_settings, model_request_parameters) as stream:
+            yield stream
+        # Not reached if the stream failed, so partial responses are never stored
+        response = stream.get()
+        if response.parts:
+            await asyncio.to_thread(self.cache.put, key, response)
+
+
+def cached_model(model: Model, agent: str) -> Model:
+    """Put the response cache in front of an agent's model if the agent opted in via Settings."""
+    settings = get_settings()
+    if settings.llm_cache_enabled and agent in settings.llm_cache_agents:
+        return CachedModel(model, agent)
+    return model
@@ -0,0 +1,162 @@
+"""Streaming of graph progress and agent tokens as custom LangGraph stream events.
+
+Nodes write plain dict events through LangGraph's stream writer; they reach
+callers of ``get_agentic_flow().astream(..., stream_mode="custom")`` and are a
+no-op otherwise. Every event has an ``event`` key:
+
+- ``node_start`` / ``node_end``: a graph node began or finished
+- ``tool_call`` / ``tool_result``: an agent called a tool and got its result
+- ``text_delta``: a chunk of an agent's final answer as the model produces it
+"""
+
+from typing import Any, AsyncIterator, Callable
+import functools
+import json
+
+import logfire
+from langgraph.config import get_stream_writer
+from langgraph.types import StreamWriter
+from pydantic_ai import Agent
+from pydantic_ai.messages import (
+    FinalResultEvent,
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    PartDeltaEvent,
+    PartStartEvent,
+    TextPart,
+    TextPartDelta,
+    ToolCallPart,
+    ToolCallPartDelta,
+    ToolReturnPart,
+)
+from pydantic_core import from_json
+
+
+def stream_writer() -> StreamWriter:
+    """The current node's stream writer, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _: None
+
+
+def stream_node(name: str, node: Callable) -> Callable:
+    """Wrap an async graph node so it reports node_start and node_end events and runs in a span."""
+
+    @functools.wraps(node)
+    async def wrapper(*args, **kwargs):
+        write = stream_writer()
+        write({"event": "node_start", "node": name})
+        try:
+            with logfire.span("graph node {node}", node=name):
+                return await node(*args, **kwargs)
+        finally:
+            write({"event": "node_end", "node": name})
+
+    return wrapper
+
+
+def sse(event: dict[str, Any]) -> str:
+    """Format an event as a server-sent event frame."""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class _AnswerDeltas:
+    """Turns the final response part of a model stream into text deltas.
+
+    Text output is forwarded as is. For structured output the tool call
+    arguments arrive as partial JSON, so the ``answer`` field is re-parsed
+    as it grows and only the new suffix is emitted.
+    """
+
+    def __init__(self, node: str, write: StreamWriter, field: str = "answer") -> None:
+        self.node = node
+        self.write = write
+        self.field = field
+        self.index: int | None = None
+        self._args = ""
+        self._sent = ""
+
+    def start(self, index: int, part: Any) -> None:
+        self.index = index
+        if isinstance(part, TextPart):
+            self._emit(part.content)
+        elif isinstance(part, ToolCallPart):
+            self._add_args(part.args)
+
+    def delta(self, delta: Any) -> None:
+        if isinstance(delta, TextPartDelta):
+            self._emit(delta.content_delta)
+        elif isinstance(delta, ToolCallPartDelta):
+            self._add_args(delta.args_delta)
+
+    def _add_args(self, args: str | dict[str, Any] | None) -> None:
+        if isinstance(args, dict):
+            answer = args.get(self.field)
+        else:
+            self._args += args or ""
+            try:
+                parsed = from_json(self._args, allow_partial="trailing-strings")
+            except ValueError:
+                return
+            answer = parsed.get(self.field) if isinstance(parsed, dict) else None
+        # An escape sequence split across chunks can make the partial value shrink; wait for more
+        if isinstance(answer, str) and answer.startswith(self._sent) and len(answer) > len(self._sent):
+            self._emit(answer[len(self._sent):])
+
+    def _emit(self, text: str) -> None:
+        if text:
+            self._sent += text
+            self.write({"event": "text_delta", "node": self.node, "delta": text})
+
+
+async def _forward_model_events(events: AsyncIterator, answer: _AnswerDeltas) -> None:
+    last_start: tuple[int, Any] | None = None
+    async for event in events:
+        if isinstance(event, PartStartEvent):
+            last_start = (event.index, event.part)
+            if event.index == answer.index:
+                answer.start(event.index, event.part)
+        elif isinstance(event, FinalResultEvent) and last_start is not None:
+            # Emitted right after the start of the part that carries the final output
+            answer.start(*last_start)
+        elif isinstance(event, PartDeltaEvent) and event.index == answer.index:
+            answer.delta(event.delta)
+
+
+async def run_agent_streamed(agent: Agent, prompt: str, node: str, **kwargs):
+    """Run an agent like ``agent.run`` while streaming its tool calls and answer tokens.
+
+    Args:
+        agent: The Pydantic AI agent to run
+        prompt: User prompt for the run
+        node: Graph node name attached to the emitted events
+        **kwargs: Passed through to ``agent.iter`` (e.g. output_type)
+
+    Returns:
+        The agent run result, as returned by ``agent.run``
+    """
+    write = stream_writer()
+    async with agent.iter(prompt, **kwargs) as run:
+        async for step in run:
+            if Agent.is_model_request_node(step):
+                async with step.stream(run.ctx) as events:
+                    await _forward_model_events(events, _AnswerDeltas(node, write))
+            elif Agent.is_call_tools_node(step):
+                async with step.stream(run.ctx) as events:
+                    async for event in events:
+                        if isinstance(event, FunctionToolCallEvent):
+                            write({
+                                "event": "tool_call",
+                                "node": node,
+                                "tool": event.part.tool_name,
+                                "args": event.part.args_as_dict(),
+                            })
+                        elif isinstance(event, FunctionToolResultEvent):
+                            write({
+                                "event": "tool_result",
+                                "node": node,
+                                "tool": event.result.tool_name,
+                                "ok": isinstance(event.result, ToolReturnPart),
+                            })
+    return run.result
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from fnmatch import fnmatch
+from typing import Any, List
+import json
+import logging
+import time
+
+# Tools matching these prefixes change server-side state and are never cached. A login
+# may switch accounts, so it clears the cache like any state change without a rule.
+MUTATING_TOOL_PREFIXES = ("place_", "modify_", "cancel_", "delete_", "login")
+
+
+def is_mutating_tool(tool_name: str) -> bool:
+    """Return True if the tool changes state on the server (orders, GTTs, ...)."""
+    return tool_name.startswith(MUTATING_TOOL_PREFIXES)
+
+
+def canonical_arguments(arguments: dict[str, Any] | None) -> str:
+    """Serialize tool arguments into a stable key, independent of key order and whitespace."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """Opt-in TTL cache for read-only MCP tool results.
+
+    Only tools listed in ``ttl`` are cached. Calling a mutating tool drops the
+    entries named by the first matching ``invalidates`` rule, or the whole
+    cache if no rule matches.
+
+    Example ``mcp_config.json`` entry::
+
+        "cache": {
+            "ttl": {"get_profile": 300, "get_holdings": 30},
+            "invalidates": {"place_*": ["get_holdings", "get_margins"]}
+        }
+    """
+
+    def __init__(
+        self,
+        ttl: dict[str, float] | None = None,
+        invalidates: dict[str, List[str]] | None = None,
+        max_entries: int = 256,
+    ) -> None:
+        self.ttl: dict[str, float] = {}
+        for tool_name, seconds in (ttl or {}).items():
+            if is_mutating_tool(tool_name):
+                logging.warning(f"Ignoring cache TTL for state-changing tool {tool_name}")
+                continue
+            self.ttl[tool_name] = float(seconds)
+        self.invalidates: dict[str, List[str]] = invalidates or {}
+        self.max_entries: int = max_entries
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        # Bumped by every invalidation, so reads in flight across one do not store stale results
+        self.generation: int = 0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> "ToolResultCache | None":
+        """Build a cache from the ``cache`` section of a server config, or None if absent."""
+        if not config or not config.get("ttl"):
+            return None
+        return cls(
+            ttl=config["ttl"],
+            invalidates=config.get("invalidates"),
+            max_entries=config.get("max_entries", 256),
+        )
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.ttl
+
+    def get(self, tool_name: str, arguments: dict[str, Any] | None) -> Any | None:
+        """Return the cached result for this call, or None on a miss or expired entry."""
+        if not self.is_cacheable(tool_name):
+            return None
+        key = (tool_name, canonical_arguments(arguments))
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, tool_name: str, arguments: dict[str, Any] | None, result: Any, generation: int | None = None) -> None:
+        """Store a successful result for a cacheable tool.
+
+        Pass the ``generation`` read before the call was sent: if the cache was
+        invalidated while it was in flight, the result may predate the change
+        and is not stored.
+        """
+        if not self.is_cacheable(tool_name) or getattr(result, "isError", False):
+            return
+        if generation is not None and generation != self.generation:
+            return
+        key = (tool_name, canonical_arguments(arguments))
+        self._entries[key] = (time.monotonic() + self.ttl[tool_name], result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_for(self, tool_name: str) -> None:
+        """Drop the entries that a call to ``tool_name`` may have made stale."""
+        self.generation += 1
+        targets = next(
+            (deps for pattern, deps in self.invalidates.items() if fnmatch(tool_name, pattern)),
+            None,
+        )
+        if targets is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if any(fnmatch(key[0], target) for target in targets)]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+# Per-user caches kept across connections; the least recently used users are dropped first
+MAX_SHARED_CACHES = 1024
+_shared_caches: OrderedDict[tuple[str, str, str], ToolResultCache | None] = OrderedDict()
+
+
+def shared_cache(server_name: str, config: dict[str, Any], user: str) -> ToolResultCache | None:
+    """The result cache of one user for a server config, shared across that user's connections.
+
+    Outside ``mcp_pool`` each specialist hop connects its own client, so a
+    cache owned by the connection would be empty on every turn. The server
+    config carries no account credentials, so results are kept apart per user:
+    one user's holdings are never served to another.
+    """
+    key = (server_name, canonical_arguments(config), user)
+    if key not in _shared_caches:
+        _shared_caches[key] = ToolResultCache.from_config(config.get("cache"))
+        while len(_shared_caches) > MAX_SHARED_CACHES:
+            _shared_caches.popitem(last=False)
+    _shared_caches.move_to_end(key)
+    return _shared_caches[key]
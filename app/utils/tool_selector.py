@@ -0,0 +1,84 @@
+from collections import Counter
+from typing import Iterable, List
+import logging
+import math
+import re
+
+from pydantic_ai import Tool as PydanticTool
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from get give i in is it me my of on or show the this to what with you".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words with a crude plural strip, so 'holdings' matches 'holding'."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower().replace("_", " ")):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class ToolSelector:
+    """Picks the tools relevant to a query with a BM25 index over names and descriptions.
+
+    Pinned tools are always offered. ``aliases`` expands user vocabulary into
+    tool vocabulary (e.g. "buy" -> "place order"). If nothing in the query
+    matches, every tool is offered so the agent is never left without the tool
+    it needs.
+    """
+
+    def __init__(
+        self,
+        tools: List[PydanticTool],
+        pinned: Iterable[str] = (),
+        aliases: dict[str, str] | None = None,
+        top_k: int = 8,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> None:
+        self.tools = tools
+        self.pinned = set(pinned)
+        self.aliases = {
+            term: tokenize(expansion) for word, expansion in (aliases or {}).items() for term in tokenize(word)
+        }
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        # Tool names are weighted double: they are short and the most telling field.
+        self._docs = [Counter(tokenize(f"{tool.name} {tool.name} {tool.description or ''}")) for tool in tools]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if tools else 0.0
+        doc_freq = Counter(term for doc in self._docs for term in doc)
+        n = len(tools)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = tokenize(query)
+        terms += [alias for term in terms for alias in self.aliases.get(term, [])]
+        scores = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, query: str) -> List[PydanticTool]:
+        """Return the pinned tools plus the ``top_k`` best-matching ones, in their original order."""
+        scores = self.scores(query)
+        ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+        if not ranked:
+            return list(self.tools)
+        chosen = set(ranked[: self.top_k])
+        selected = [tool for i, tool in enumerate(self.tools) if i in chosen or tool.name in self.pinned]
+        logging.debug(f"Selected {len(selected)}/{len(self.tools)} tools: {[tool.name for tool in selected]}")
+        return selected
@@ -0,0 +1,44 @@
+from typing import Any, List
+import logging
+
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import SchemaError
+from jsonschema.validators import validator_for
+
+
+class ArgumentValidator:
+    """Checks tool arguments against an MCP tool's ``inputSchema``.
+
+    The schema is checked and compiled once, so validating a call costs a
+    local walk over the arguments instead of a round-trip to the server.
+    """
+
+    def __init__(self, schema: dict[str, Any]) -> None:
+        validator_class = validator_for(schema, default=Draft202012Validator)
+        validator_class.check_schema(schema)
+        self._validator = validator_class(schema)
+
+    def errors(self, arguments: dict[str, Any]) -> List[dict[str, str]]:
+        """Return structured errors for the arguments, or an empty list if they are valid."""
+        return [
+            {
+                "path": "/" + "/".join(str(part) for part in error.absolute_path),
+                "message": error.message,
+            }
+            for error in sorted(self._validator.iter_errors(arguments), key=lambda e: list(map(str, e.absolute_path)))
+        ]
+
+
+def compile_validator(tool_name: str, schema: dict[str, Any] | None) -> ArgumentValidator | None:
+    """Compile a validator for a tool, or None if it has no usable schema.
+
+    A schema the validator cannot handle disables local checks for that tool
+    only; the server still validates the call.
+    """
+    if not schema:
+        return None
+    try:
+        return ArgumentValidator(schema)
+    except SchemaError as e:
+        logging.warning(f"Skipping local argument validation for tool {tool_name}: {e.message}")
+        return None
@@ -0,0 +1,223 @@
+"""Local tracing for the agentic flow.
+
+``configure_tracing`` sets up logfire without sending anything to an external
+service. Spans go to a JSONL file instead (one finished span per line), and
+Pydantic AI agent runs and model calls are instrumented automatically. Graph
+nodes, MCP connects and MCP tool calls open their own spans. Prompts, answers
+and tool arguments are left out of the file unless ``Settings.trace_content``
+is set, and the file is rotated once it reaches ``Settings.trace_file_max_bytes``.
+
+Print a latency breakdown of the recorded turns with::
+
+    python -m app.utils.tracing [--file .traces/spans.jsonl] [--turns 5] [--top 25]
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Sequence
+import argparse
+import json
+import threading
+
+import logfire
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from app.core.config import get_settings
+
+ROOT = "<root>"
+
+# Span attributes in which Pydantic AI records message contents and tool arguments
+CONTENT_ATTRIBUTES = frozenset({"events", "all_messages_events", "final_result", "tool_arguments"})
+
+
+def _attribute(value: Any) -> Any:
+    return list(value) if isinstance(value, tuple) else value
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends finished spans to a JSONL file.
+
+    Args:
+        path: File spans are appended to
+        include_content: Keep the attributes holding prompts, answers and tool arguments
+        max_bytes: Size at which the file is renamed to ``<path>.1`` and a new one started; unbounded if None
+    """
+
+    def __init__(self, path: str | Path, include_content: bool = False, max_bytes: int | None = None) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.include_content = include_content
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = []
+        for span in spans:
+            attributes = span.attributes or {}
+            lines.append(json.dumps({
+                # Rendered message, e.g. "graph node zerodha_agent" rather than "graph node {node}".
+                # Messages only template low-cardinality values so stacks add up across turns;
+                # per-turn values such as the thread id stay in the attributes.
+                "name": attributes.get("logfire.msg", span.name),
+                "trace_id": format(span.context.trace_id, "032x"),
+                "span_id": format(span.context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start": span.start_time,
+                "end": span.end_time,
+                "status": span.status.status_code.name,
+                "attributes": {
+                    key: _attribute(value)
+                    for key, value in attributes.items()
+                    if not key.startswith(("logfire.", "code."))
+                    and (self.include_content or key not in CONTENT_ATTRIBUTES)
+                },
+            }, default=str))
+        data = "\n".join(lines) + "\n"
+        try:
+            with self._lock:
+                self._rotate(len(data.encode("utf-8")))
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(data)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def _rotate(self, incoming: int) -> None:
+        if self.max_bytes is None or not self.path.exists():
+            return
+        if self.path.stat().st_size + incoming > self.max_bytes:
+            self.path.replace(self.path.with_name(self.path.name + ".1"))
+
+    def shutdown(self) -> None:
+        pass
+
+
+@lru_cache()
+def configure_tracing() -> None:
+    """Configure logfire once per process, exporting spans to the local trace file only."""
+    settings = get_settings()
+    exporter = JsonlSpanExporter(
+        settings.trace_file, include_content=settings.trace_content, max_bytes=settings.trace_file_max_bytes
+    )
+    processors = [BatchSpanProcessor(exporter)] if settings.tracing_enabled else []
+    logfire.configure(send_to_logfire=False, console=False, additional_span_processors=processors)
+    if settings.tracing_enabled:
+        logfire.instrument_pydantic_ai()
+
+
+def load_spans(path: str | Path) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _duration(span: dict) -> float:
+    return (span["end"] - span["start"]) / 1e9
+
+
+class TraceTree:
+    """Spans of one trace, indexed by parent."""
+
+    def __init__(self, spans: List[dict]) -> None:
+        ids = {span["span_id"] for span in spans}
+        self.children: dict[str, List[dict]] = defaultdict(list)
+        for span in sorted(spans, key=lambda s: s["start"]):
+            parent = span["parent_id"] if span["parent_id"] in ids else ROOT
+            self.children[parent].append(span)
+        self.roots = self.children[ROOT]
+
+    def self_time(self, span: dict) -> float:
+        children = self.children.get(span["span_id"], [])
+        covered = _covered([(child["start"], child["end"]) for child in children])
+        return max(_duration(span) - covered, 0.0)
+
+    def walk(self, span: dict, stack: tuple = ()):
+        """Yield (stack of names, span) for the span and its descendants."""
+        stack = stack + (span["name"],)
+        yield stack, span
+        for child in self.children.get(span["span_id"], []):
+            yield from self.walk(child, stack)
+
+
+def _covered(intervals: List[tuple]) -> float:
+    """Seconds covered by possibly overlapping (start, end) intervals in nanoseconds."""
+    total, current_end = 0, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            total += end - start
+            current_end = end
+        elif end > current_end:
+            total += end - current_end
+            current_end = end
+    return total / 1e9
+
+
+def group_traces(spans: List[dict]) -> List[TraceTree]:
+    traces: dict[str, List[dict]] = defaultdict(list)
+    for span in spans:
+        traces[span["trace_id"]].append(span)
+    trees = [TraceTree(trace) for trace in traces.values()]
+    return sorted((tree for tree in trees if tree.roots), key=lambda tree: tree.roots[0]["start"])
+
+
+def print_turn(tree: TraceTree, depth: int = 3) -> None:
+    """Print one trace with children of the same name aggregated at each level."""
+    root = tree.roots[0]
+    thread = root["attributes"].get("thread_id", "")
+    print(f"\n{root['name']}  {_duration(root):.2f}s  {thread}")
+
+    def show(span: dict, level: int) -> None:
+        if level > depth:
+            return
+        groups: dict[str, List[dict]] = defaultdict(list)
+        for child in tree.children.get(span["span_id"], []):
+            groups[child["name"]].append(child)
+        for name, members in groups.items():
+            total = sum(_duration(member) for member in members)
+            count = f" x{len(members)}" if len(members) > 1 else ""
+            print(f"{'  ' * level}{name}{count}  {total:.2f}s")
+            for member in members:
+                show(member, level + 1)
+
+    show(root, 1)
+
+
+def flame_summary(trees: List[TraceTree], top: int = 25) -> List[tuple]:
+    """Aggregate (stack, count, total seconds, self seconds) over all traces, most self time first."""
+    totals: dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    for tree in trees:
+        for root in tree.roots:
+            for stack, span in tree.walk(root):
+                entry = totals[stack]
+                entry[0] += 1
+                entry[1] += _duration(span)
+                entry[2] += tree.self_time(span)
+    rows = [(stack, int(count), total, own) for stack, (count, total, own) in totals.items()]
+    return sorted(rows, key=lambda row: -row[3])[:top]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Latency breakdown of recorded agentic flow turns")
+    parser.add_argument("--file", default=get_settings().trace_file, help="JSONL span file")
+    parser.add_argument("--turns", type=int, default=5, help="Number of most recent turns to show")
+    parser.add_argument("--top", type=int, default=25, help="Number of stacks in the flame summary")
+    args = parser.parse_args(argv)
+
+    trees = group_traces(load_spans(args.file))
+    if not trees:
+        print(f"No spans in {args.file}")
+        return
+
+    print(f"=== Last {min(args.turns, len(trees))} of {len(trees)} traces ===")
+    for tree in trees[-args.turns:]:
+        print_turn(tree)
+
+    print("\n=== Flame summary (by self time) ===")
+    print(f"{'self':>9} {'total':>9} {'count':>6}  stack")
+    for stack, count, total, own in flame_summary(trees, args.top):
+        print(f"{own:8.2f}s {total:8.2f}s {count:6d}  {';'.join(stack)}")
+
+
+if __name__ == "__main__":
+    main()
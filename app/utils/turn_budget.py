@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import List, Optional
+import logging
+
+from app.core.config import get_settings
+from app.utils.metrics import counter
+
+TURN_BUDGET_TRIPS = counter(
+    "graph_turn_budget_trips_total", "Turns cut short by a hop, time, token or loop limit.", ["reason"]
+)
+
+
+@dataclass
+class TurnLimits:
+    """Limits on one turn of the agentic flow (one user message).
+
+    Attributes:
+        max_hops: Specialist steps allowed per turn
+        max_seconds: Wall-clock seconds allowed per turn
+        max_tokens: Model tokens the specialists may use per turn
+        max_repeats: Times in a row the same specialists may be dispatched before it counts as a loop
+    """
+    max_hops: int
+    max_seconds: float
+    max_tokens: int
+    max_repeats: int
+
+    @classmethod
+    def from_config(cls, config: dict | None = None) -> "TurnLimits":
+        """Limits from Settings, overridable per thread through ``config["configurable"]``."""
+        settings = get_settings()
+        configurable = (config or {}).get("configurable", {})
+        return cls(
+            max_hops=configurable.get("max_hops", settings.turn_max_hops),
+            max_seconds=configurable.get("max_turn_seconds", settings.turn_max_seconds),
+            max_tokens=configurable.get("max_turn_tokens", settings.turn_max_tokens),
+            max_repeats=configurable.get("max_repeated_routes", settings.turn_max_repeated_routes),
+        )
+
+    def exceeded(self, hops: int, elapsed: float, tokens: int, decisions: List[str]) -> Optional[str]:
+        """Return the name of the first limit the turn has reached, or None."""
+        if hops >= self.max_hops:
+            return "hops"
+        if elapsed >= self.max_seconds:
+            return "time"
+        if tokens >= self.max_tokens:
+            return "tokens"
+        if len(decisions) >= self.max_repeats and len(set(decisions[-self.max_repeats:])) == 1:
+            return "loop"
+        return None
+
+
+def record_trip(reason: str, thread_id: str | None = None) -> None:
+    TURN_BUDGET_TRIPS.inc(reason=reason)
+    logging.warning(f"Turn stopped early on thread {thread_id}: {reason} limit reached")
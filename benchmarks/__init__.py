@@ -0,0 +1,6 @@
+"""Offline benchmarks for the agentic flow.
+
+Nothing here talks to a real LLM or the Kite bridge: models are scripted
+pydantic-ai ``FunctionModel``s and MCP servers are local stubs, both with
+injected latency, so runs are reproducible on any machine.
+"""
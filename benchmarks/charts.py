@@ -0,0 +1,91 @@
+"""Event-loop stalls while rendering charts, inline versus in the worker pool.
+
+Renders a batch of charts concurrently while a ticker task measures how late
+the event loop wakes it up, first calling the renderer directly on the loop
+(as the chart tools used to) and then through ``app.tools.charts.render_chart``::
+
+    python -m benchmarks.charts --charts 8 --points 2000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from app.core.config import get_settings
+from app.tools.charts import get_render_pool, render_chart
+from app.utils.tracing import configure_tracing
+from benchmarks.run import percentile
+
+
+def chart_specs(count: int, points: int) -> list[tuple[str, dict]]:
+    rng = random.Random(0)
+    kinds = [
+        ("histogram", lambda: {"data": [rng.gauss(50, 15) for _ in range(points)], "title": "Histogram"}),
+        ("line_chart", lambda: {"x_values": list(range(points)),
+                                "y_values": [rng.random() for _ in range(points)], "title": "Line"}),
+        ("scatter_plot", lambda: {"x_values": [rng.random() for _ in range(points)],
+                                  "y_values": [rng.random() for _ in range(points)], "title": "Scatter"}),
+        ("bar_chart", lambda: {"categories": [f"Category {i}" for i in range(12)],
+                               "values": [rng.randint(10, 100) for _ in range(12)], "title": "Bar"}),
+    ]
+    return [(kinds[i % len(kinds)][0], kinds[i % len(kinds)][1]()) for i in range(count)]
+
+
+async def measure(render, specs: list[tuple[str, dict]], tick: float) -> tuple[float, list[float]]:
+    """Render ``specs`` concurrently; return the wall time and how late each ticker wake-up was."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - start - tick)
+
+    ticking = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(render(kind, options) for kind, options in specs))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticking
+    return elapsed, lags
+
+
+def summary(label: str, elapsed: float, lags: list[float]) -> None:
+    print(
+        f"{label:<8} {elapsed:6.2f}s total  loop lag p50 {percentile(lags, 50) * 1000:7.1f}ms  "
+        f"p99 {percentile(lags, 99) * 1000:7.1f}ms  max {max(lags) * 1000:7.1f}ms"
+    )
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare event-loop lag of inline and pooled chart rendering")
+    parser.add_argument("--charts", type=int, default=8)
+    parser.add_argument("--points", type=int, default=2000, help="Data points per chart")
+    parser.add_argument("--tick", type=float, default=0.01, help="Ticker interval in seconds")
+    args = parser.parse_args(argv)
+    configure_tracing()
+    specs = chart_specs(args.charts, args.points)
+
+    async def inline(kind: str, options: dict) -> str:
+        from app.tools.chart_render import render
+
+        return render(kind, options)
+
+    async def pooled(kind: str, options: dict) -> str:
+        return await render_chart(kind, **options)
+
+    pool = get_render_pool()
+    print(f"{args.charts} charts at {args.points} points, {get_settings().chart_render_workers} render workers\n")
+    # Start the workers first so both runs measure rendering, not process start-up
+    await pooled(*chart_specs(1, 10)[0])
+
+    summary("inline", *await measure(inline, specs, args.tick))
+    summary("pool", *await measure(pooled, specs, args.tick))
+    pool.close()
+    pool.join()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+"""Scripted stand-in for the LLM, with injected latency.
+
+One ``FunctionModel`` serves every agent in the flow and answers by role:
+
+- the router gets a routing label derived from the request
+- the specialists call one data tool, then give their structured reply
+- the summary and end-of-conversation agents get a short text answer
+"""
+
+from dataclasses import dataclass
+import asyncio
+import json
+import random
+import zlib
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+# Data tools the specialists call, in order of preference
+DATA_TOOLS = ["get_holdings", "get_positions", "get_ltp", "get_stock_price", "get_company_news", "get_profile"]
+ROUTER_LABELS = ["zerodha_agent", "financial_analyst", "multi_market", "end_conversation_agent"]
+
+
+@dataclass
+class FakeModelConfig:
+    """Behaviour of the scripted model.
+
+    Attributes:
+        latency: Mean seconds per model call
+        jitter: Fraction of ``latency`` calls vary by, uniformly either way
+        chunks: Number of streamed chunks a text answer is split into
+        final_ratio: Share of specialist replies marked final (the rest go through end_conversation)
+        answer_words: Length of the specialists' answers in words
+        seed: Seed for the latency and reply randomness
+    """
+    latency: float = 0.05
+    jitter: float = 0.5
+    chunks: int = 8
+    final_ratio: float = 0.5
+    answer_words: int = 60
+    seed: int = 0
+
+
+def _system_prompt(messages: list[ModelMessage]) -> str:
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, SystemPromptPart):
+                    return part.content
+    return ""
+
+
+def _last_prompt(messages: list[ModelMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                    return part.content
+    return ""
+
+
+def _called_tool(messages: list[ModelMessage]) -> bool:
+    return any(
+        isinstance(part, ToolReturnPart)
+        for message in messages if isinstance(message, ModelRequest)
+        for part in message.parts
+    )
+
+
+class FakeModel:
+    """Builds the scripted ``FunctionModel``.
+
+    Args:
+        config: Latency and reply behaviour
+    """
+
+    def __init__(self, config: FakeModelConfig | None = None) -> None:
+        self.config = config or FakeModelConfig()
+        self.rng = random.Random(self.config.seed)
+        self.calls = 0
+
+    def model(self) -> FunctionModel:
+        return FunctionModel(self.respond, stream_function=self.respond_stream, model_name="bench-fake")
+
+    async def _sleep(self) -> None:
+        self.calls += 1
+        spread = self.config.latency * self.config.jitter
+        await asyncio.sleep(max(self.config.latency + self.rng.uniform(-spread, spread), 0))
+
+    def _reply(self, messages: list[ModelMessage], info: AgentInfo) -> TextPart | ToolCallPart:
+        system = _system_prompt(messages)
+        if "route the user" in system:
+            # Stable per request, so repeated prompts route the same way
+            label = ROUTER_LABELS[zlib.crc32(_last_prompt(messages).encode()) % len(ROUTER_LABELS)]
+            return TextPart(f'"{label}"')
+        if info.output_tools:
+            names = {tool.name for tool in info.function_tools}
+            tool = next((name for name in DATA_TOOLS if name in names), None)
+            if tool and not _called_tool(messages):
+                return ToolCallPart(tool_name=tool, args={})
+            answer = " ".join(["Your", "portfolio", "is", "doing", "fine."] * (self.config.answer_words // 5))
+            reply = {
+                "answer": answer,
+                "next": "end_conversation",
+                "final": self.rng.random() < self.config.final_ratio,
+            }
+            return ToolCallPart(tool_name=info.output_tools[0].name, args=reply)
+        if "running summary" in system:
+            return TextPart("The user asked about their holdings and US prices; all were answered.")
+        return TextPart("Here is a summary of what the agents found. " * 4)
+
+    async def respond(self, messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        await self._sleep()
+        return ModelResponse(parts=[self._reply(messages, info)])
+
+    async def respond_stream(self, messages: list[ModelMessage], info: AgentInfo):
+        await self._sleep()
+        part = self._reply(messages, info)
+        if isinstance(part, ToolCallPart):
+            args = json.dumps(part.args)
+            size = max(len(args) // self.config.chunks, 1)
+            for start in range(0, len(args), size):
+                name = part.tool_name if start == 0 else None
+                yield {0: DeltaToolCall(name=name, json_args=args[start:start + size])}
+                await asyncio.sleep(0)
+            return
+        size = max(len(part.content) // self.config.chunks, 1)
+        for start in range(0, len(part.content), size):
+            yield part.content[start:start + size]
+            await asyncio.sleep(0)
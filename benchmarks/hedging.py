@@ -0,0 +1,108 @@
+"""Tail latency with and without request hedging, against the stub OpenAI-compatible server.
+
+Starts ``benchmarks.stub_openai_server`` in-process, sends the same request
+stream through a plain OpenAI model and through a ``HedgedModel`` wrapping
+it, and compares the latency percentiles and the share of hedged requests::
+
+    python -m benchmarks.hedging --requests 400 --tail-rate 0.05 --tail-latency 2 --stream
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import time
+
+import uvicorn
+from pydantic_ai import Agent
+from pydantic_ai.models import Model
+from pydantic_ai.models.openai import OpenAIModel
+from pydantic_ai.providers.openai import OpenAIProvider
+
+from app.utils.hedging import LLM_HEDGES, LLM_HEDGES_SKIPPED, HedgedModel, HedgePolicy
+from benchmarks.run import percentile
+from benchmarks.stub_openai_server import StubLatency, create_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def measure(model: Model, requests: int, concurrency: int, stream: bool) -> list[float]:
+    """Send ``requests`` prompts through an agent on ``model`` and return each one's latency."""
+    agent = Agent(model)
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index: int) -> None:
+        async with limit:
+            start = time.perf_counter()
+            if stream:
+                async with agent.run_stream(f"question {index}") as result:
+                    async for _ in result.stream_text(delta=True):
+                        pass
+            else:
+                await agent.run(f"question {index}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return latencies
+
+
+def summary(label: str, latencies: list[float]) -> None:
+    print(
+        f"{label:<10} p50 {percentile(latencies, 50):.3f}s  p90 {percentile(latencies, 90):.3f}s  "
+        f"p99 {percentile(latencies, 99):.3f}s  max {max(latencies):.3f}s"
+    )
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare tail latency with and without request hedging")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub server seconds before the first token")
+    parser.add_argument("--tail-latency", type=float, default=2.0, help="Stub server seconds in the slow tail")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Share of stub server requests in the slow tail")
+    parser.add_argument("--percentile", type=float, default=90.0, help="Hedge after this first-token latency percentile")
+    parser.add_argument("--max-rate", type=float, default=0.1, help="Maximum share of requests hedged")
+    parser.add_argument("--stream", action="store_true", help="Use streamed requests")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    port = free_port()
+    latency = StubLatency(args.latency, args.tail_latency, args.tail_rate)
+    server = uvicorn.Server(uvicorn.Config(create_app(latency), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    try:
+        provider = OpenAIProvider(base_url=f"http://127.0.0.1:{port}/v1", api_key="stub")
+        model = OpenAIModel("stub-model", provider=provider)
+        print(f"{args.requests} {'streamed ' if args.stream else ''}requests, "
+              f"{args.tail_rate:.0%} of them delayed to {args.tail_latency}s\n")
+
+        summary("plain", await measure(model, args.requests, args.concurrency, args.stream))
+
+        policy = HedgePolicy(
+            percentile=args.percentile, max_rate=args.max_rate, initial_delay=args.latency * 3, min_delay=args.latency
+        )
+        hedged = HedgedModel(model, "benchmark", policy=policy)
+        summary("hedged", await measure(hedged, args.requests, args.concurrency, args.stream))
+
+        hedges = sum(LLM_HEDGES.value(agent="benchmark", winner=winner) for winner in ("primary", "hedge"))
+        print(
+            f"\nhedged {hedges:.0f} of {args.requests} requests ({hedges / args.requests:.1%}), "
+            f"hedge won {LLM_HEDGES.value(agent='benchmark', winner='hedge'):.0f}, "
+            f"{LLM_HEDGES_SKIPPED.value(agent='benchmark'):.0f} skipped over budget, "
+            f"threshold ended at {policy.threshold():.3f}s"
+        )
+    finally:
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
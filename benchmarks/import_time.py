@@ -0,0 +1,129 @@
+"""Import-time budget check for the application entry points.
+
+Imports each entry point in a fresh interpreter with ``-X importtime`` and
+fails (exit status 1) if it takes longer than its budget, loads a module
+that should only be imported on first use, or (for library modules) writes
+files on import. Meant to run in CI::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget app.main=2.5 --runs 5 --top 15
+
+Each entry point is imported ``--runs`` times and the fastest run counts,
+which keeps the check stable on a noisy machine.
+"""
+
+from pathlib import Path
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded on first use only; importing an entry point must not pull them in
+HEAVY_MODULES = ["matplotlib", "pandas", "numpy", "boto3", "openai"]
+# The MCP client stack loads with the first specialist run, not with the graph
+MCP_CLIENT_MODULES = ["mcp.client", "jsonschema"]
+
+# Entry point -> (seconds allowed for its import, modules it must not load)
+ENTRY_POINTS = {
+    "app.graph": (3.0, HEAVY_MODULES + MCP_CLIENT_MODULES),
+    "app.main": (3.5, HEAVY_MODULES + MCP_CLIENT_MODULES),
+    "app.batch": (3.5, HEAVY_MODULES),
+    # Started as a stdio subprocess for every MCP connection
+    "app.agents.financial_analyst.server": (1.5, HEAVY_MODULES),
+}
+# Imported by the entry points; opening the checkpoint database or the trace file is left to them
+SIDE_EFFECT_FREE = {"app.graph"}
+
+
+def profile_import(module: str) -> tuple[dict[str, int], list[str]]:
+    """Import ``module`` in a fresh interpreter, from an empty working directory.
+
+    Returns the cumulative import time of every module, in µs, and the files
+    the import created in the working directory.
+    """
+    env = {
+        "PATH": os.environ.get("PATH", ""),
+        "HOME": os.environ.get("HOME", ""),
+        "PYTHONPATH": str(ROOT),
+        "PYTHONWARNINGS": "ignore",
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env=env, cwd=workdir,
+        )
+        created = sorted(str(path.relative_to(workdir)) for path in Path(workdir).rglob("*"))
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times, created
+
+
+def check(module: str, budget: float, deferred_modules: list[str], runs: int, top: int) -> list[str]:
+    """Profile one entry point and return the budget violations found."""
+    profiles = [profile_import(module) for _ in range(runs)]
+    fastest, created = min(profiles, key=lambda profile: profile[0][module])
+    seconds = fastest[module] / 1e6
+
+    status = "ok" if seconds <= budget else "OVER BUDGET"
+    print(f"\n{module}: {seconds:.2f}s (budget {budget:.2f}s) {status}")
+    # Heaviest top-level packages, to show where a regression came from
+    packages: dict[str, int] = {}
+    for name, cumulative in fastest.items():
+        package = name.split(".")[0]
+        if package == module.split(".")[0]:
+            continue
+        packages[package] = max(packages.get(package, 0), cumulative)
+    for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {cumulative / 1e6:6.2f}s  {package}")
+
+    failures = []
+    if seconds > budget:
+        failures.append(f"{module} took {seconds:.2f}s to import, budget is {budget:.2f}s")
+    for deferred in deferred_modules:
+        if deferred in fastest:
+            failures.append(f"{module} imports {deferred}, which should only load on first use")
+    if module in SIDE_EFFECT_FREE and created:
+        failures.append(f"{module} created {', '.join(created)} on import")
+    return failures
+
+
+def parse_budget(value: str) -> tuple[str, float]:
+    module, _, seconds = value.partition("=")
+    return module, float(seconds)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail if the entry points take too long to import")
+    parser.add_argument("--budget", action="append", type=parse_budget, default=[], metavar="MODULE=SECONDS",
+                        help="Override or add a budget; may be repeated")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per entry point; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest packages to list per entry point")
+    args = parser.parse_args(argv)
+
+    entry_points = dict(ENTRY_POINTS)
+    for module, seconds in args.budget:
+        entry_points[module] = (seconds, entry_points.get(module, (0, HEAVY_MODULES))[1])
+    failures = []
+    for module, (budget, deferred_modules) in entry_points.items():
+        failures += check(module, budget, deferred_modules, args.runs, args.top)
+
+    if failures:
+        print("\nImport-time check failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nImport-time check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""End-to-end benchmark of the agentic flow with a scripted model and stub MCP servers.
+
+Drives many concurrent synthetic chat sessions through ``stream_chat`` and
+reports throughput, turn latency percentiles, memory growth and where the
+time went per graph node. Run from the repository root::
+
+    python -m benchmarks.run --sessions 200 --turns 3 --model-latency 0.05
+    python -m benchmarks.run --transport stdio --sessions 20 --json baseline.json
+
+Checkpoints, the response cache and traces go to a temporary directory, so
+runs do not touch the application's own files.
+"""
+
+from collections import defaultdict
+from contextlib import AsyncExitStack, redirect_stdout
+from pathlib import Path
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks.fake_model import FakeModel, FakeModelConfig
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROMPTS = [
+    "show my holdings",
+    "what is the price of AAPL and how are my positions doing",
+    "any news on apple stock",
+    "hello, what can you do for me",
+    "what is the ltp of INFY",
+    "summarize my portfolio performance",
+]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (q in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB, or the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def stub_server_config(transport: str, tool_latency: float) -> dict:
+    """MCP config pointing every specialist at the stub server."""
+    os.environ["BENCH_TOOL_LATENCY"] = str(tool_latency)
+    if transport == "inprocess":
+        server = {"transport": "inprocess", "module": "benchmarks.stub_mcp_server"}
+    else:
+        server = {
+            "command": sys.executable,
+            "args": ["-m", "benchmarks.stub_mcp_server"],
+            "env": {"BENCH_TOOL_LATENCY": str(tool_latency), "PYTHONPATH": str(ROOT), "PATH": os.environ.get("PATH", "")},
+        }
+    return {"mcpServers": {"bench_stub": {**server, "max_concurrency": 50, "timeout": 30}}}
+
+
+class Recorder:
+    """Collects turn and node timings from the streamed events."""
+
+    def __init__(self) -> None:
+        self.turns: list[float] = []
+        self.nodes: dict[str, list[float]] = defaultdict(list)
+        self.errors = 0
+
+    async def run_turn(self, stream_chat, prompt: str, thread_id: str) -> None:
+        started, running = time.perf_counter(), {}
+        async for event in stream_chat(prompt, thread_id):
+            now = time.perf_counter()
+            if event["event"] == "node_start":
+                running[event["node"]] = now
+            elif event["event"] == "node_end" and event["node"] in running:
+                self.nodes[event["node"]].append(now - running.pop(event["node"]))
+            elif event["event"] == "error":
+                self.errors += 1
+        self.turns.append(time.perf_counter() - started)
+
+
+async def run_sessions(args: argparse.Namespace, stream_chat) -> tuple[Recorder, float]:
+    recorder = Recorder()
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def session(index: int) -> None:
+        async with limit:
+            thread_id = f"bench-{uuid.uuid4()}"
+            for turn in range(args.turns):
+                await recorder.run_turn(stream_chat, PROMPTS[(index + turn) % len(PROMPTS)], thread_id)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(index) for index in range(args.sessions)))
+    return recorder, time.perf_counter() - started
+
+
+def report(args: argparse.Namespace, recorder: Recorder, elapsed: float, memory: dict, model_calls: int) -> dict:
+    turns = recorder.turns
+    result = {
+        "sessions": args.sessions,
+        "turns": len(turns),
+        "concurrency": args.concurrency,
+        "transport": args.transport,
+        "warm_mcp": args.warm_mcp,
+        "model_latency": args.model_latency,
+        "tool_latency": args.tool_latency,
+        "errors": recorder.errors,
+        "model_calls": model_calls,
+        "wall_seconds": round(elapsed, 3),
+        "turns_per_second": round(len(turns) / elapsed, 2) if elapsed else 0.0,
+        "turn_latency": {
+            "p50": round(percentile(turns, 50), 4),
+            "p90": round(percentile(turns, 90), 4),
+            "p99": round(percentile(turns, 99), 4),
+            "max": round(max(turns, default=0.0), 4),
+        },
+        "memory_mb": memory,
+        "nodes": {
+            name: {
+                "count": len(times),
+                "mean": round(sum(times) / len(times), 4),
+                "p50": round(percentile(times, 50), 4),
+                "p99": round(percentile(times, 99), 4),
+                "total": round(sum(times), 3),
+            }
+            for name, times in sorted(recorder.nodes.items(), key=lambda item: -sum(item[1]))
+        },
+    }
+
+    latency = result["turn_latency"]
+    mcp = f"{args.transport} MCP{', warm' if args.warm_mcp else ''}"
+    print(f"\n=== {result['turns']} turns over {args.sessions} sessions ({mcp}) ===")
+    print(f"wall time      {elapsed:.2f}s")
+    print(f"throughput     {result['turns_per_second']} turns/s, {model_calls} model calls, {recorder.errors} errors")
+    print(f"turn latency   p50 {latency['p50']:.3f}s  p90 {latency['p90']:.3f}s  p99 {latency['p99']:.3f}s  max {latency['max']:.3f}s")
+    print(f"memory         {memory['start']:.1f} MB -> {memory['end']:.1f} MB ({memory['growth']:+.1f} MB)")
+    print(f"\n{'node':<20} {'count':>6} {'mean':>8} {'p50':>8} {'p99':>8} {'total':>9}")
+    for name, stats in result["nodes"].items():
+        print(f"{name:<20} {stats['count']:>6} {stats['mean']:>7.3f}s {stats['p50']:>7.3f}s {stats['p99']:>7.3f}s {stats['total']:>8.2f}s")
+    return result
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the agentic flow")
+    parser.add_argument("--sessions", type=int, default=100, help="Synthetic chat sessions to run")
+    parser.add_argument("--turns", type=int, default=3, help="User messages per session")
+    parser.add_argument("--concurrency", type=int, default=100, help="Sessions running at once")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Mean seconds per model call")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Seconds per MCP tool call")
+    parser.add_argument("--final-ratio", type=float, default=0.5, help="Share of specialist replies marked final")
+    parser.add_argument("--transport", choices=["inprocess", "stdio"], default="inprocess", help="How to reach the stub MCP server")
+    parser.add_argument("--warm-mcp", action="store_true", help="Share warm MCP connections between runs (mcp_pool)")
+    parser.add_argument("--warmup", type=int, default=2, help="Sessions run before measuring")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the scripted model")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the flow's own console output")
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> dict:
+    args = parse_args(argv)
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    os.environ.setdefault("CHECKPOINT_DB", str(workdir / "checkpoints.sqlite"))
+    os.environ.setdefault("LLM_CACHE_PATH", str(workdir / "llm_responses.sqlite"))
+    os.environ.setdefault("TRACE_FILE", str(workdir / "spans.jsonl"))
+
+    fake = FakeModel(FakeModelConfig(
+        latency=args.model_latency, final_ratio=args.final_ratio, seed=args.seed,
+    ))
+    # Point every agent at the scripted model; the scheduler, metering and caches stay in the path
+    from app.core.config import get_settings
+    from app.utils.model import registered_models
+    registered_models["bench:fake"] = fake.model()
+    settings = get_settings()
+    settings.default_model, settings.agent_models = "bench:fake", {}
+
+    import app.agents.financial_analyst.agent as financial_analyst
+    import app.agents.zerodha_agent.agent as zerodha_agent
+    from app.graph import stream_chat
+    from app.utils.mcp_client import mcp_pool
+    from app.utils.tracing import configure_tracing
+
+    configure_tracing()
+
+    config_file = workdir / "mcp_config.json"
+    config_file.write_text(json.dumps(stub_server_config(args.transport, args.tool_latency)))
+    zerodha_agent.CONFIG_FILE = financial_analyst.CONFIG_FILE = config_file
+
+    console = sys.stdout if args.verbose else io.StringIO()
+    with redirect_stdout(console):
+        async with AsyncExitStack() as stack:
+            if args.warm_mcp:
+                await stack.enter_async_context(mcp_pool())
+            warmup = argparse.Namespace(**{**vars(args), "sessions": args.warmup, "turns": 1})
+            await run_sessions(warmup, stream_chat)
+            fake.calls = 0
+            start_rss = rss_mb()
+            recorder, elapsed = await run_sessions(args, stream_chat)
+            end_rss = rss_mb()
+
+    memory = {"start": round(start_rss, 1), "end": round(end_rss, 1), "growth": round(end_rss - start_rss, 1)}
+    result = report(args, recorder, elapsed, memory, fake.calls)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+        print(f"\nResults written to {args.json}")
+    return result
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Stub MCP server standing in for the Kite bridge and the financial analyst tools.
+
+Every tool sleeps for ``BENCH_TOOL_LATENCY`` seconds (default 0.02) and
+returns a small canned JSON payload. Used in-process by the benchmark
+harness, or over stdio with::
+
+    python -m benchmarks.stub_mcp_server
+"""
+
+import asyncio
+import json
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("bench-stub")
+
+
+async def _respond(payload: dict) -> str:
+    await asyncio.sleep(float(os.getenv("BENCH_TOOL_LATENCY", "0.02")))
+    return json.dumps(payload)
+
+
+@mcp.tool()
+async def login() -> str:
+    """Log in to the trading account."""
+    return await _respond({"status": "logged_in"})
+
+
+@mcp.tool()
+async def get_profile() -> str:
+    """Get the user's profile."""
+    return await _respond({"user_id": "AB1234", "user_name": "Bench User"})
+
+
+@mcp.tool()
+async def get_holdings() -> str:
+    """Get the user's holdings in the portfolio."""
+    return await _respond({"holdings": [
+        {"tradingsymbol": symbol, "quantity": 10, "average_price": 1000.0, "last_price": 1050.0}
+        for symbol in ("INFY", "TCS", "RELIANCE", "HDFCBANK")
+    ]})
+
+
+@mcp.tool()
+async def get_positions() -> str:
+    """Get the user's open positions."""
+    return await _respond({"net": [{"tradingsymbol": "INFY", "quantity": 5, "pnl": 120.5}]})
+
+
+@mcp.tool()
+async def get_ltp(symbol: str = "INFY") -> str:
+    """Get the last traded price of a stock."""
+    return await _respond({symbol: {"last_price": 1050.0}})
+
+
+@mcp.tool()
+async def get_stock_price(symbol: str = "AAPL") -> str:
+    """Get the current price of a US stock or crypto."""
+    return await _respond({"symbol": symbol, "price": 190.0, "currency": "USD"})
+
+
+@mcp.tool()
+async def get_company_news(symbol: str = "AAPL") -> str:
+    """Get recent news for a company."""
+    return await _respond({"symbol": symbol, "news": [{"title": f"{symbol} beats estimates"}]})
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,113 @@
+"""Stub OpenAI-compatible chat completions server with injected latency.
+
+Answers ``POST /v1/chat/completions`` (plain and streamed) with a canned
+reply after a delay: ``--latency`` seconds normally, and ``--tail-latency``
+seconds for a ``--tail-rate`` share of requests, to mimic a provider with a
+slow tail. Run standalone with::
+
+    python -m benchmarks.stub_openai_server --port 8765 --latency 0.1 --tail-latency 3 --tail-rate 0.05
+
+and point a model at it with ``OpenAIProvider(base_url="http://127.0.0.1:8765/v1", api_key="stub")``.
+"""
+
+from dataclasses import dataclass
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+REPLY = "This is a canned answer from the stub model server."
+
+
+@dataclass
+class StubLatency:
+    """Injected latency before the first token.
+
+    Attributes:
+        latency: Seconds before the first token for most requests
+        tail_latency: Seconds before the first token for requests in the slow tail
+        tail_rate: Share of requests in the slow tail
+        seed: Seed for picking the slow requests
+    """
+    latency: float = 0.1
+    tail_latency: float = 3.0
+    tail_rate: float = 0.05
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+    def delay(self) -> float:
+        return self.tail_latency if self.rng.random() < self.tail_rate else self.latency
+
+
+def create_app(latency: StubLatency) -> FastAPI:
+    app = FastAPI(title="Stub OpenAI-compatible server")
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(latency.delay())
+        completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), body.get("model", "stub")
+        usage = {"prompt_tokens": 10, "completion_tokens": len(REPLY.split()), "total_tokens": 10 + len(REPLY.split())}
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": REPLY},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for word in REPLY.split(" "):
+                yield chunk({"content": word + " "})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible server with injected latency")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds before the first token")
+    parser.add_argument("--tail-latency", type=float, default=3.0, help="Seconds before the first token in the slow tail")
+    parser.add_argument("--tail-rate", type=float, default=0.05, help="Share of requests in the slow tail")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    latency = StubLatency(args.latency, args.tail_latency, args.tail_rate, args.seed)
+    uvicorn.run(create_app(latency), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()